@@ -0,0 +1,70 @@
+from functools import wraps
+
+from flask import g
+from flask_login import LoginManager, current_user
+
+from identity import get_principal
+from tokens import auth_tokens, InvalidToken
+
+
+login_manager = LoginManager()
+login_manager.login_view = 'auth.login'
+
+
+@login_manager.user_loader
+def load_user(user_id):
+    # Cached, detached Principal instead of a User row; see identity.py
+    return get_principal(int(user_id))
+
+
+@login_manager.request_loader
+def load_user_from_token(req):
+    # Bearer access tokens: the Principal comes straight from the signed claims
+    auth = req.headers.get('Authorization', '')
+    if not auth_tokens.enabled or not auth.startswith('Bearer '):
+        return None
+    try:
+        claims = auth_tokens.decode(auth[7:], 'access')
+    except InvalidToken:
+        return None
+    g.token_claims = claims
+    return auth_tokens.principal(claims)
+
+
+def login_required_resource(func):
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if not current_user.is_authenticated:
+            return {'error': 'Authentication required'}, 401
+        return func(*args, **kwargs)
+    return wrapper
+
+def customer_required(func):
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if not current_user.is_authenticated:
+            return {'error': 'Authentication required'}, 401
+        if current_user.role != 'customer':
+            return {'error': 'Access denied: customers only'}, 403
+        return func(*args, **kwargs)
+    return wrapper
+
+def staff_required(func):
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if not current_user.is_authenticated:
+            return {'error': 'Authentication required'}, 401
+        if current_user.role not in ['staff', 'admin']:
+            return {'error': 'Unauthorized'}, 403
+        return func(*args, **kwargs)
+    return wrapper
+
+def admin_required(func):
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if not current_user.is_authenticated:
+            return {'error': 'Authentication required'}, 401
+        if current_user.role != 'admin':
+            return {'error': 'Access denied: admin only'}, 403
+        return func(*args, **kwargs)
+    return wrapper
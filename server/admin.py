@@ -0,0 +1,218 @@
+import io
+import os
+from datetime import datetime
+
+from flask import Blueprint, request, Response, stream_with_context, send_from_directory, current_app
+from flask_restful import Api, Resource
+
+from models import db, User, Loan, LoanSettings, SavingsTransaction
+from access import staff_required, admin_required
+from dashboard import dashboard_cache
+import portfolio
+from settings_cache import loan_settings
+from identity import identity_cache
+from tokens import auth_tokens
+from audit import audit_log
+from search_index import customer_search
+from profiler import profiler
+
+
+bp = Blueprint('admin', __name__, url_prefix='/api')
+api = Api(bp)
+
+
+class UserManagement(Resource):
+    @admin_required
+    def put(self, user_id):
+        data = request.get_json()
+        new_role = data.get('role')  # Example: updating a user's role
+
+        if new_role not in ['customer', 'staff', 'admin']:
+            return {'error': 'Invalid role'}, 400
+
+        user = User.query.get_or_404(user_id)
+        old_role = user.role
+        user.role = new_role  # Update the user's role
+        db.session.commit()
+        identity_cache.evict(user.id)
+        dashboard_cache.evict(user.id)
+        auth_tokens.revoke_user(user.id)  # issued tokens still claim the old role
+        audit_log.record('user.role_changed', 'user', user.id, old_role=old_role, new_role=new_role)
+
+        return {'message': f'User {user_id} updated to {new_role} role'}, 200
+
+    @admin_required
+    def delete(self, user_id):
+        user = User.query.get_or_404(user_id)
+        
+        # Prevent deletion of the admin user (if you want to protect yourself from accidental deletion)
+        if user.role == 'admin':
+            return {'error': 'Cannot delete an admin user'}, 400
+        
+        # Profiles and an unused savings account go with the user; loans and
+        # ledger entries are financial records and block the deletion
+        account = user.customer.savings_account if user.customer else None
+        has_loans = Loan.query.filter_by(customer_id=user_id).first() is not None
+        has_savings = account is not None and (
+            account.balance_minor or SavingsTransaction.query.filter_by(account_id=account.id).first() is not None
+        )
+        if has_loans or has_savings:
+            return {'error': 'User has loans or savings history and cannot be deleted'}, 409
+
+        role = user.role
+        if account is not None:
+            portfolio.record_deposit_change(0.0, accounts=-1)
+        db.session.delete(user)
+        db.session.commit()
+        identity_cache.evict(user_id)
+        dashboard_cache.evict(user_id)
+        auth_tokens.revoke_user(user_id)
+        customer_search.remove(user_id)
+        audit_log.record('user.deleted', 'user', user_id, role=role)
+
+        return {'message': f'User {user_id} deleted successfully'}, 200
+
+
+class LoanSettingsResource(Resource):
+    @admin_required
+    def put(self):
+        data = request.get_json()
+        new_rate = data.get('interest_rate')
+
+        if not new_rate or new_rate <= 0:
+            return {'error': 'Invalid interest rate'}, 400
+
+        settings = LoanSettings.query.first()
+        old_rate = settings.default_interest_rate if settings else None
+        if not settings:
+            settings = LoanSettings(default_interest_rate=new_rate)
+            db.session.add(settings)
+        else:
+            settings.default_interest_rate = new_rate
+        
+        db.session.commit()
+        loan_settings.invalidate()
+        audit_log.record('loan_settings.updated', 'loan_settings', settings.id, old_rate=old_rate, new_rate=new_rate)
+
+        return {'message': f'Default interest rate updated to {new_rate}%'}, 200
+
+
+class PortfolioResource(Resource):
+    @admin_required
+    def get(self):
+        return portfolio.summary(), 200
+
+
+class CustomerSearchResource(Resource):
+    # GET ?q=&limit=20 typeahead over name, email, national id and account
+    # number, answered from the in-process index in search_index.py
+    @staff_required
+    def get(self):
+        query = request.args.get('q', '').strip()
+        try:
+            limit = int(request.args.get('limit', 20))
+        except ValueError:
+            return {'error': 'Invalid limit'}, 400
+
+        if not query:
+            return {'error': 'Missing query'}, 400
+        if not 1 <= limit <= 100:
+            return {'error': 'Limit must be between 1 and 100'}, 400
+        if not customer_search.enabled:
+            return {'error': 'Customer search is disabled'}, 404
+        if not customer_search.ready:
+            return {'error': 'Search index is still loading, please retry shortly'}, 503, {'Retry-After': '1'}
+
+        return {'results': customer_search.search(query, limit)}, 200
+
+
+class ExportResource(Resource):
+    # GET /api/admin/export/<table>?format=ndjson|csv&gzip=1
+    @admin_required
+    def get(self, table):
+        import export  # admin-only; kept out of web worker start-up
+
+        fmt = request.args.get('format', 'ndjson')
+        compress = request.args.get('gzip') in ('1', 'true')
+
+        if table not in export.TABLES:
+            return {'error': 'Unknown table'}, 404
+        if fmt not in export.FORMATS:
+            return {'error': 'Invalid format'}, 400
+
+        body = stream_with_context(export.iter_export(table, fmt, compress))
+        return Response(
+            body,
+            mimetype='application/gzip' if compress else export.FORMATS[fmt],
+            headers={'Content-Disposition': f'attachment; filename={export.filename(table, fmt, compress)}'},
+        )
+
+
+class CustomerImportResource(Resource):
+    # POST a CSV as multipart field 'file' or as the raw request body
+    @admin_required
+    def post(self):
+        import importer  # admin-only; kept out of web worker start-up
+
+        upload = request.files.get('file')
+        source = io.TextIOWrapper(upload.stream if upload else request.stream, encoding='utf-8', newline='')
+
+        rejects_dir = current_app.config.get('IMPORT_REJECTS_DIR', os.path.join(current_app.instance_path, 'imports'))
+        os.makedirs(rejects_dir, exist_ok=True)
+        rejects_path = os.path.join(rejects_dir, f'rejects-{datetime.utcnow():%Y%m%d%H%M%S%f}.csv')
+
+        failure = None
+        try:
+            with open(rejects_path, 'w', encoding='utf-8', newline='') as rejects:
+                result = importer.CustomerImporter(rejects).run(source)
+        except importer.ImportFailed as exc:
+            # Earlier chunks are committed; report them so a retry can
+            # resume from the failing line instead of hitting duplicates
+            db.session.rollback()
+            failure, result = exc, exc.result
+
+        if not result.rejected:
+            os.remove(rejects_path)
+            rejects_path = None
+        if failure is not None:
+            return {**result.as_dict(), 'rejects_file': rejects_path, 'error': str(failure), 'line': failure.line}, 400
+        return {**result.as_dict(), 'rejects_file': rejects_path}, 200
+
+
+class ProfileTokenResource(Resource):
+    # POST {path, ttl}: a ?_profile= flag that profiles requests to path until it expires
+    @admin_required
+    def post(self):
+        data = request.get_json() or {}
+        path = data.get('path')
+        ttl = data.get('ttl', 600)
+        if not path or not path.startswith('/'):
+            return {'error': 'path must be an absolute URL path'}, 400
+        if not isinstance(ttl, int) or not 0 < ttl <= 3600:
+            return {'error': 'ttl must be between 1 and 3600 seconds'}, 400
+        token, expires = profiler.sign(path, ttl)
+        return {'token': token, 'url': f'{path}?_profile={token}', 'expires_at': datetime.utcfromtimestamp(expires).isoformat()}, 201
+
+
+class ProfileResource(Resource):
+    # GET lists recent profiles; GET <name>?kind=folded|sql downloads one
+    @admin_required
+    def get(self, name=None):
+        if name is None:
+            return {'profiles': profiler.recent()}, 200
+        kind = request.args.get('kind', 'folded')
+        if kind not in ('folded', 'sql'):
+            return {'error': 'Invalid kind'}, 400
+        if name not in profiler.recent():
+            return {'error': 'Profile not found'}, 404
+        return send_from_directory(profiler.directory, f'{name}.{kind}', mimetype='text/plain')
+
+
+api.add_resource(UserManagement, '/user/<int:user_id>')
+api.add_resource(LoanSettingsResource, '/admin/loan-settings')
+api.add_resource(PortfolioResource, '/admin/portfolio')
+api.add_resource(CustomerSearchResource, '/staff/customers/search')
+api.add_resource(ExportResource, '/admin/export/<string:table>')
+api.add_resource(CustomerImportResource, '/admin/import/customers')
+api.add_resource(ProfileTokenResource, '/admin/profile-token')
+api.add_resource(ProfileResource, '/admin/profiles', '/admin/profiles/<string:name>')
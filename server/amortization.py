@@ -0,0 +1,114 @@
+import numpy as np
+
+
+METHODS = ('annuity', 'flat')
+
+
+class Schedule:
+    # Arrays are shaped (loans, months) and padded with zeros past each
+    # loan's own duration, so a whole portfolio is one set of arrays.
+    def __init__(self, payment, principal, interest, balance, durations):
+        self.payment = payment
+        self.principal = principal
+        self.interest = interest
+        self.balance = balance
+        self.durations = durations
+
+    def __len__(self):
+        return self.payment.shape[0]
+
+    @property
+    def total_interest(self):
+        return self.interest.sum(axis=1)
+
+    @property
+    def total_payment(self):
+        return self.payment.sum(axis=1)
+
+    def monthly_cashflow(self):
+        # Expected collections for each month across every loan in the batch
+        return self.payment.sum(axis=0)
+
+    def rows(self, index=0, decimals=2):
+        months = int(self.durations[index])
+        columns = (self.payment, self.principal, self.interest, self.balance)
+        payment, principal, interest, balance = (np.round(c[index, :months], decimals).tolist() for c in columns)
+        return [
+            {
+                'month': month + 1,
+                'payment': payment[month],
+                'principal': principal[month],
+                'interest': interest[month],
+                'balance': balance[month],
+            }
+            for month in range(months)
+        ]
+
+
+def compute_schedule(amounts, interest_rates, durations, method='annuity'):
+    # interest_rates are annual percentages, as stored on Loan.interest_rate;
+    # durations are in months. Scalars and sequences are both accepted.
+    if method not in METHODS:
+        raise ValueError(f'Unknown amortization method: {method}')
+
+    amounts, rates, durations = np.broadcast_arrays(
+        np.atleast_1d(np.asarray(amounts, dtype=np.float64)),
+        np.atleast_1d(np.asarray(interest_rates, dtype=np.float64)),
+        np.atleast_1d(np.asarray(durations, dtype=np.int64)),
+    )
+    if (durations <= 0).any():
+        raise ValueError('Loan durations must be positive')
+
+    horizon = int(durations.max()) if durations.size else 0
+    monthly_rate = (rates / 100.0 / 12.0)[:, None]
+    principal_0 = amounts[:, None]
+    n = durations[:, None]
+    k = np.arange(1, horizon + 1)[None, :]
+    active = k <= n
+
+    if method == 'annuity':
+        growth_n = (1.0 + monthly_rate) ** n
+        growth_k = (1.0 + monthly_rate) ** k
+        zero_rate = monthly_rate == 0
+        safe_rate = np.where(zero_rate, 1.0, monthly_rate)
+
+        level = np.where(
+            zero_rate,
+            principal_0 / n,
+            principal_0 * safe_rate * growth_n / np.where(zero_rate, 1.0, growth_n - 1.0),
+        )
+        balance = np.where(
+            zero_rate,
+            principal_0 - level * k,
+            principal_0 * growth_k - level * (growth_k - 1.0) / safe_rate,
+        )
+        previous_balance = np.concatenate([principal_0, balance[:, :-1]], axis=1)
+        interest = previous_balance * monthly_rate
+        payment = np.repeat(level, horizon, axis=1)
+        principal = payment - interest
+    else:
+        principal = np.repeat(principal_0 / n, horizon, axis=1)
+        interest = np.repeat(principal_0 * monthly_rate, horizon, axis=1)
+        payment = principal + interest
+        balance = principal_0 - principal * k
+
+    # Clamp floating point residue on the final balance
+    balance = np.where(np.isclose(balance, 0.0, atol=1e-6), 0.0, balance)
+
+    zeros = np.zeros_like(payment)
+    return Schedule(
+        payment=np.where(active, payment, zeros),
+        principal=np.where(active, principal, zeros),
+        interest=np.where(active, interest, zeros),
+        balance=np.where(active, balance, zeros),
+        durations=durations,
+    )
+
+
+def schedule_for_loans(loans, method='annuity'):
+    return compute_schedule(
+        [loan.amount for loan in loans],
+        [loan.interest_rate for loan in loans],
+        [loan.loan_duration for loan in loans],
+        method=method,
+    )
@@ -0,0 +1,174 @@
+import atexit
+import json
+import logging
+import os
+import threading
+from collections import deque
+from datetime import datetime
+
+import click
+from flask import has_request_context, current_app
+from flask.cli import AppGroup
+from flask_login import current_user
+from sqlalchemy import insert
+from werkzeug.local import LocalProxy
+
+from models import db, AuditEvent
+
+
+logger = logging.getLogger(__name__)
+
+
+class AuditLog:
+    # Write-behind audit trail. Handlers record events after their commit;
+    # a background thread bulk-inserts them every flush_interval seconds or
+    # as soon as batch_size are waiting. Events that can't reach the
+    # database (buffer full, insert failed, shutdown) are appended to a
+    # spool file and replayed on the next start.
+    def __init__(self, buffer_size=10000, batch_size=500, flush_interval=1.0):
+        self.buffer_size = buffer_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spool_path = None
+        self.enabled = True
+        self.app = None
+        self._buffer = deque()
+        self._lock = threading.Lock()
+        self._spool_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._thread = None
+        self._pid = None
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config.get('AUDIT_ENABLED', self.enabled)
+        self.buffer_size = app.config.get('AUDIT_BUFFER_SIZE', self.buffer_size)
+        self.batch_size = app.config.get('AUDIT_BATCH_SIZE', self.batch_size)
+        self.flush_interval = app.config.get('AUDIT_FLUSH_INTERVAL', self.flush_interval)
+        self.spool_path = app.config.get('AUDIT_SPOOL_PATH', os.path.join(app.instance_path, 'audit.spool'))
+        atexit.register(self.shutdown)
+
+    def record(self, action, entity, entity_id, actor_id=None, **data):
+        if not self.enabled:
+            return
+        if actor_id is None and has_request_context() and current_user.is_authenticated:
+            actor_id = current_user.id
+        event = {
+            'created_at': datetime.utcnow(), 'actor_id': actor_id, 'action': action,
+            'entity': entity, 'entity_id': entity_id, 'data': data,
+        }
+
+        self._ensure_flusher()
+        with self._lock:
+            full = len(self._buffer) >= self.buffer_size
+            if not full:
+                self._buffer.append(event)
+                pending = len(self._buffer)
+        if full:
+            self._spool([event])
+        elif pending >= self.batch_size:
+            self._wakeup.set()
+
+    def _ensure_flusher(self):
+        # Started lazily, and again after a fork, so each worker flushes its own buffer
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._buffer.clear()
+                    self._stopping = False
+                    self._thread = threading.Thread(target=self._run, name='audit-flusher', daemon=True)
+                    self._thread.start()
+                    self._pid = os.getpid()
+
+    def _run(self):
+        self.replay_spool()
+        while not self._stopping:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def _insert(self, events):
+        with self.app.app_context():
+            with db.engine.begin() as conn:
+                conn.execute(insert(AuditEvent), events)
+
+    def flush(self):
+        while True:
+            with self._lock:
+                batch = [self._buffer.popleft() for _ in range(min(self.batch_size, len(self._buffer)))]
+            if not batch:
+                return
+            try:
+                self._insert(batch)
+            except Exception:
+                logger.exception('Audit flush failed; spooling %d events', len(batch))
+                self._spool(batch)
+                return
+
+    def _spool(self, events):
+        with self._spool_lock:
+            with open(self.spool_path, 'a') as f:
+                for event in events:
+                    f.write(json.dumps({**event, 'created_at': event['created_at'].isoformat()}) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+
+    def replay_spool(self):
+        # Claim the spool by renaming it, so only one worker replays it
+        if not self.spool_path or not os.path.exists(self.spool_path):
+            return 0
+        claimed = f'{self.spool_path}.{os.getpid()}'
+        try:
+            os.rename(self.spool_path, claimed)
+        except FileNotFoundError:
+            return 0
+
+        with open(claimed) as f:
+            events = [json.loads(line) for line in f if line.strip()]
+        for event in events:
+            event['created_at'] = datetime.fromisoformat(event['created_at'])
+        start = 0
+        try:
+            for start in range(0, len(events), self.batch_size):
+                self._insert(events[start:start + self.batch_size])
+        except Exception:
+            logger.exception('Audit spool replay failed; respooling %d events', len(events) - start)
+            self._spool(events[start:])
+            os.remove(claimed)
+            return start
+        os.remove(claimed)
+        return len(events)
+
+    def shutdown(self):
+        if self._pid != os.getpid():
+            return  # nothing recorded in this process; the buffer is a fork's copy
+        self._stopping = True
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval + 5)
+        with self._lock:
+            remaining = list(self._buffer)
+            self._buffer.clear()
+        if remaining:
+            try:
+                self._insert(remaining)
+            except Exception:
+                self._spool(remaining)
+
+
+def init_app(app):
+    app.extensions['audit_log'] = instance = AuditLog()
+    instance.init_app(app)
+
+
+audit_log = LocalProxy(lambda: current_app.extensions['audit_log'])
+
+
+audit_cli = AppGroup('audit', help='Audit trail maintenance.')
+
+
+@audit_cli.command('replay')
+def replay_command():
+    """Insert events left in the audit spool file."""
+    click.echo(f'Replayed {audit_log.replay_spool()} audit events.')
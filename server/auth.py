@@ -0,0 +1,147 @@
+from flask import Blueprint, request, g
+from flask_restful import Api, Resource
+from flask_login import login_user, logout_user, current_user
+
+from models import db, User, Customer, Staff, Admin, SavingsAccount
+import portfolio
+from identity import get_principal
+from hashing import password_hasher, HashingBusy
+from rate_limit import rate_limiter
+from tokens import auth_tokens, InvalidToken
+from search_index import customer_search
+
+
+bp = Blueprint('auth', __name__, url_prefix='/api')
+api = Api(bp)
+
+
+def hashing_busy_response(exc):
+    return {'error': 'Server busy, please retry shortly'}, 503, {'Retry-After': str(exc.retry_after)}
+
+
+def rate_limited_response(retry_after):
+    return {'error': 'Too many attempts, please retry later'}, 429, {'Retry-After': str(retry_after)}
+
+
+class Register(Resource):
+    def post(self):
+        data = request.get_json()
+
+        username = data.get('username')
+        email = data.get('email')
+        password = data.get('password')
+        role = data.get('role')  # 'customer', 'staff', or 'admin'
+
+        retry_after = rate_limiter.hit('register_ip', request.remote_addr)
+        if retry_after:
+            return rate_limited_response(retry_after)
+        
+        if role not in ['customer', 'staff', 'admin']:
+            return {'error': 'Invalid role'}, 400
+
+        if User.query.filter_by(username=username).first() or User.query.filter_by(email=email).first():
+            return {'error': 'Username or Email already exists'}, 400
+        
+        try:
+            password_hash = password_hasher.hash(password)
+        except HashingBusy as exc:
+            return hashing_busy_response(exc)
+
+        new_user = User(username=username, email=email, role=role, password_hash=password_hash)
+        db.session.add(new_user)
+        db.session.commit()
+
+        # Create profile based on role
+        if role == 'customer':
+            customer = Customer(user=new_user)
+            db.session.add(customer)
+            savings = SavingsAccount(customer=customer, balance=0.0)
+            db.session.add(savings)
+            portfolio.record_deposit_change(0.0, accounts=1)
+        elif role == 'staff':
+            db.session.add(Staff(user=new_user))
+        elif role == 'admin':
+            db.session.add(Admin(user=new_user))
+
+       
+        db.session.commit()
+        if role == 'customer':
+            customer_search.index_customer(new_user.id, username, email)
+
+        return {'message': 'User created successfully!'}, 201
+
+
+class Login(Resource):
+    def post(self):
+        data = request.get_json()
+        email = data.get('email')
+        password = data.get('password')
+
+        # Rejected before the user lookup and the password hash. The account
+        # token is refunded on success, so only failed attempts count against
+        # it and its owner can't lock themself out by logging in.
+        account = (email or '').strip().lower() or None
+        retry_after = rate_limiter.hit('login_ip', request.remote_addr) \
+            or rate_limiter.hit('login_account', account)
+        if retry_after:
+            return rate_limited_response(retry_after)
+        
+        user = User.query.filter_by(email=email).first()
+        
+        if not user:
+            return {'error': 'Invalid credentials'}, 401
+
+        try:
+            valid = password_hasher.verify(user.password_hash, password)
+            # Upgrade hashes made with older parameters while we have the plaintext
+            if valid and password_hasher.needs_rehash(user.password_hash):
+                user.password_hash = password_hasher.hash(password)
+                db.session.commit()
+        except HashingBusy as exc:
+            return hashing_busy_response(exc)
+
+        if valid:
+            rate_limiter.refund('login_account', account)
+            if data.get('auth') == 'token' and auth_tokens.enabled:
+                return auth_tokens.issue(get_principal(user.id)), 200
+            login_user(user)
+            return {'message': f'Logged in as {user.username}'}, 200
+        return {'error': 'Invalid credentials'}, 401
+
+
+class Logout(Resource):
+    def get(self):
+        if current_user.is_authenticated:
+            claims = g.get('token_claims')
+            if claims:
+                auth_tokens.revoke(claims)
+            else:
+                logout_user()
+            return {'message': 'Logged out successfully!'}, 200
+        return {'error': 'No user logged in'}, 400
+
+
+class TokenRefresh(Resource):
+    def post(self):
+        if not auth_tokens.enabled:
+            return {'error': 'Token authentication is disabled'}, 404
+        data = request.get_json() or {}
+        try:
+            claims = auth_tokens.decode(data.get('refresh_token') or '', 'refresh')
+        except InvalidToken as exc:
+            return {'error': str(exc)}, 401
+
+        # Role and ids may have changed since the last refresh
+        principal = get_principal(claims['sub'])
+        if principal is None:
+            return {'error': 'Unknown user'}, 401
+
+        # Rotate: each refresh token works once
+        auth_tokens.denylist.revoke(claims['jti'], claims['exp'])
+        return auth_tokens.issue(principal), 200
+
+
+api.add_resource(Register, '/register')
+api.add_resource(Login, '/login')
+api.add_resource(Logout, '/logout')
+api.add_resource(TokenRefresh, '/token/refresh')  # POST {refresh_token}
@@ -0,0 +1,139 @@
+"""Concurrent write throughput per database profile.
+
+    python bench_db.py --processes 4 --threads 4 --writes 200
+
+For each DB_PROFILE a fresh SQLite database is seeded, then several worker
+processes (like gunicorn workers), each with several threads, hammer it
+with savings deposits through ledger.post_entry. Reports committed writes
+per second, lock errors and latency percentiles per profile.
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def worker(args):
+    from sqlalchemy.exc import OperationalError
+    from app import create_app
+    from models import db, SavingsAccount
+    import ledger
+
+    app = create_app()
+    with app.app_context():
+        account_ids = [account_id for account_id, in db.session.query(SavingsAccount.id).limit(args.accounts)]
+
+    lock = threading.Lock()
+    latencies, errors = [], {}
+
+    def run(index):
+        rng = random.Random(args.seed * 1000 + os.getpid() + index)
+        for _ in range(args.writes):
+            started = time.perf_counter()
+            with app.app_context():
+                try:
+                    ledger.post_entry(rng.choice(account_ids), rng.randint(100, 10000), 'deposit')
+                    db.session.commit()
+                    ok = True
+                except OperationalError as exc:
+                    db.session.rollback()
+                    ok = False
+                    reason = str(exc.orig).split('\n')[0]
+            elapsed = time.perf_counter() - started
+            with lock:
+                if ok:
+                    latencies.append(elapsed)
+                else:
+                    errors[reason] = errors.get(reason, 0) + 1
+
+    # Wall-clock bounds of the write phase, so interpreter start-up and
+    # imports in each process don't count against throughput
+    started = time.time()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        list(pool.map(run, range(args.threads)))
+    json.dump({'latencies': latencies, 'errors': errors, 'started': started, 'finished': time.time()}, sys.stdout)
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))]
+
+
+def run_profile(profile, args):
+    db_path = os.path.join(tempfile.gettempdir(), f'malibora_bench_{profile}.db')
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+
+    env = {**os.environ, 'DATABASE_URL': f'sqlite:///{db_path}', 'DB_PROFILE': profile}
+    here = os.path.dirname(os.path.abspath(__file__))
+    subprocess.run(
+        [sys.executable, os.path.join(here, 'generate_data.py'), '--users', str(args.accounts), '--drop', '--quiet'],
+        env=env, check=True, stdout=subprocess.DEVNULL,
+    )
+
+    command = [sys.executable, os.path.abspath(__file__), '--worker',
+               '--threads', str(args.threads), '--writes', str(args.writes),
+               '--accounts', str(args.accounts), '--seed', str(args.seed)]
+    procs = [subprocess.Popen(command, env=env, cwd=here, stdout=subprocess.PIPE) for _ in range(args.processes)]
+    outputs = [json.loads(proc.communicate()[0]) for proc in procs]
+    wall_time = max(output['finished'] for output in outputs) - min(output['started'] for output in outputs)
+
+    latencies = sorted(latency for output in outputs for latency in output['latencies'])
+    errors = {}
+    for output in outputs:
+        for reason, count in output['errors'].items():
+            errors[reason] = errors.get(reason, 0) + count
+
+    return {
+        'profile': profile,
+        'wall_time_s': round(wall_time, 3),
+        'committed': len(latencies),
+        'failed': sum(errors.values()),
+        'errors': errors,
+        'writes_per_s': round(len(latencies) / wall_time, 1),
+        'latency_ms': {
+            'p50': round(percentile(latencies, 50) * 1000, 2),
+            'p95': round(percentile(latencies, 95) * 1000, 2),
+            'p99': round(percentile(latencies, 99) * 1000, 2),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare concurrent write throughput across DB profiles.')
+    parser.add_argument('--profiles', default='default,tuned')
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--writes', type=int, default=200, help='writes per thread')
+    parser.add_argument('--accounts', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='write results as JSON')
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        return worker(args)
+
+    results = [run_profile(profile, args) for profile in args.profiles.split(',')]
+    print(f"{'profile':10} {'writes/s':>10} {'committed':>10} {'failed':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for result in results:
+        latency = result['latency_ms']
+        print(f"{result['profile']:10} {result['writes_per_s']:>10} {result['committed']:>10} {result['failed']:>8} "
+              f"{latency['p50']:>8} {latency['p95']:>8} {latency['p99']:>8}")
+        for reason, count in result['errors'].items():
+            print(f'    {count} x {reason}')
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""Cold-start latency of a web worker and of the flask CLI.
+
+    python bench_startup.py --runs 10 --output startup.json
+
+Each run starts a fresh interpreter (as an autoscaled worker would) and
+times `import app`, `create_app()`, the first request and a second,
+warm one (GET /api/dashboard as a seeded customer). The wall time of
+`flask --help` is measured the same way, next to a bare `python -c pass`
+for the interpreter's own start-up.
+"""
+import argparse
+import json
+import os
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+
+PHASES = ('interpreter', 'import', 'create_app', 'first_request', 'second_request', 'cli_help')
+
+
+def worker(args):
+    started = time.perf_counter()
+    import app as app_module
+    imported = time.perf_counter()
+    app = app_module.create_app()
+    created = time.perf_counter()
+
+    # Log the customer in through the session cookie, so the timed requests
+    # don't include password hashing
+    with sqlite3.connect(args.db) as conn:
+        user_id, = conn.execute("SELECT id FROM users WHERE username = 'customer1'").fetchone()
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+
+    timings = {'import': imported - started, 'create_app': created - imported}
+    for phase in ('first_request', 'second_request'):
+        request_started = time.perf_counter()
+        response = client.get('/api/dashboard')
+        timings[phase] = time.perf_counter() - request_started
+        if response.status_code != 200:
+            raise SystemExit(f'{phase} returned {response.status_code}: {response.get_data(as_text=True)}')
+    json.dump(timings, sys.stdout)
+
+
+def wall_time(command, env, cwd):
+    started = time.perf_counter()
+    subprocess.run(command, env=env, cwd=cwd, check=True, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - started
+
+
+def run(args):
+    here = os.path.dirname(os.path.abspath(__file__))
+    env = {**os.environ, 'DATABASE_URL': f'sqlite:///{args.db}', 'FLASK_APP': 'app.py'}
+    subprocess.run([sys.executable, os.path.join(here, 'seed.py')], env=env, cwd=here, check=True,
+                   stdout=subprocess.DEVNULL)
+
+    samples = {phase: [] for phase in PHASES}
+    for _ in range(args.runs):
+        samples['interpreter'].append(wall_time([sys.executable, '-c', 'pass'], env, here))
+        samples['cli_help'].append(wall_time([sys.executable, '-m', 'flask', '--help'], env, here))
+        output = subprocess.run([sys.executable, os.path.abspath(__file__), '--worker', '--db', args.db],
+                                env=env, cwd=here, check=True, stdout=subprocess.PIPE).stdout
+        for phase, seconds in json.loads(output).items():
+            samples[phase].append(seconds)
+
+    return {
+        phase: {
+            'median_ms': round(statistics.median(values) * 1000, 1),
+            'min_ms': round(min(values) * 1000, 1),
+            'max_ms': round(max(values) * 1000, 1),
+        }
+        for phase, values in samples.items()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure worker and CLI cold-start latency.')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--db', default=os.path.join(tempfile.gettempdir(), 'malibora_startup.db'))
+    parser.add_argument('--output', help='write results as JSON')
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    args.db = os.path.abspath(args.db)
+
+    if args.worker:
+        return worker(args)
+
+    results = run(args)
+    print(f"{'phase':16} {'median ms':>10} {'min ms':>8} {'max ms':>8}")
+    for phase, result in results.items():
+        print(f"{phase:16} {result['median_ms']:>10} {result['min_ms']:>8} {result['max_ms']:>8}")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+# Cross-process invalidation for per-worker caches: a writer bumps the
+# mtime of a shared file after committing, and readers compare it with the
+# mtime they last saw, at the cost of a stat() per check.
+
+def read_signal(path):
+    if not path:
+        return None
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def touch_signal(path):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'a'):
+        pass
+    os.utime(path, ns=(time.time_ns(), time.time_ns()))
+
+
+class LRUCache:
+    # Thread-safe LRU with a per-entry TTL, for small per-worker caches
+    def __init__(self, maxsize=10000, ttl=60, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires, value)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= self.clock():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (self.clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def evict(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
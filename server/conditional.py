@@ -0,0 +1,65 @@
+from flask import Response, jsonify, request
+from sqlalchemy import select
+
+from models import db, Loan, SavingsAccount, from_minor
+
+
+class Projection:
+    # A fixed column list and its output keys, built once at import so a
+    # poll selects only the columns it returns plus the row version.
+    def __init__(self, model, fields, converters=None):
+        self.model = model
+        self.keys = tuple(key for key, _ in fields)
+        self.converters = converters or {}
+        self.stmt = select(model.version, *(column for _, column in fields))
+        self.version_stmt = select(model.version)
+
+    def version(self, *criteria):
+        return db.session.execute(self.version_stmt.where(*criteria)).scalar()
+
+    def fetch(self, *criteria):
+        row = db.session.execute(self.stmt.where(*criteria)).first()
+        if row is None:
+            return None
+        payload = dict(zip(self.keys, row[1:]))
+        for key, convert in self.converters.items():
+            payload[key] = convert(payload[key])
+        return row[0], payload
+
+
+LOAN_STATUS = Projection(Loan, (
+    ('loan_id', Loan.id),
+    ('amount', Loan.amount),
+    ('status', Loan.status),
+    ('interest_rate', Loan.interest_rate),
+    ('loan_duration', Loan.loan_duration),
+    ('accrued_interest', Loan.accrued_interest),
+))
+
+SAVINGS_BALANCE = Projection(SavingsAccount, (
+    ('balance', SavingsAccount.balance_minor),
+), converters={'balance': from_minor})
+
+
+def _validate(response, etag):
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def versioned_response(projection, resource, *criteria):
+    # Pollers that send If-None-Match get a 304 after a version-only query;
+    # everyone else gets one projected query. None when no row matches.
+    if request.if_none_match:
+        version = projection.version(*criteria)
+        if version is None:
+            return None
+        etag = f'{resource}-{version}'
+        if request.if_none_match.contains_weak(etag):
+            return _validate(Response(status=304), etag)
+
+    found = projection.fetch(*criteria)
+    if found is None:
+        return None
+    version, payload = found
+    return _validate(jsonify(payload), f'{resource}-{version}')
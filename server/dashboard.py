@@ -1,32 +1,129 @@
+import hashlib
+import json
+
 from flask_restful import Resource
-from flask import jsonify
+from flask import jsonify, request, current_app
 from flask_login import login_required, current_user
-from models import Customer, Staff, Admin
+from sqlalchemy.orm import joinedload
+from werkzeug.local import LocalProxy
+
+from models import User, Customer
+from amortization import compute_schedule
+from cache import LRUCache
+
+
+class DashboardCache(LRUCache):
+    # Entries are (etag, payload); savings and loan writes evict the owner's
+    # entry after committing, the TTL covers writes made by other workers.
+    def init_app(self, app):
+        self.maxsize = app.config.get('DASHBOARD_CACHE_SIZE', self.maxsize)
+        self.ttl = app.config.get('DASHBOARD_CACHE_TTL', self.ttl)
+
+
+def init_app(app):
+    app.extensions['dashboard_cache'] = instance = DashboardCache(maxsize=10000, ttl=30)
+    instance.init_app(app)
+
+
+dashboard_cache = LocalProxy(lambda: current_app.extensions['dashboard_cache'])
+
+ACTIVE_LOAN_STATUSES = ('submitted', 'pending', 'approved')
+
+
+def _customer_payload(user):
+    profile = user.customer
+    savings = profile.savings_account if profile else None
+    loans = sorted((loan for loan in user.loans if loan.status in ACTIVE_LOAN_STATUSES), key=lambda loan: loan.id)
+
+    # One batched amortization call for every approved loan
+    approved = [loan for loan in loans if loan.status == 'approved']
+    installments = {}
+    if approved:
+        schedule = compute_schedule(
+            [loan.amount for loan in approved],
+            [loan.interest_rate for loan in approved],
+            [loan.loan_duration for loan in approved],
+        )
+        installments = {loan.id: round(float(payment), 2) for loan, payment in zip(approved, schedule.payment[:, 0])}
+
+    return {
+        'message': f'Welcome {user.username}!',
+        'account_number': profile.account_number if profile else None,
+        'address': profile.address if profile else None,
+        'national_id': profile.national_id if profile else None,
+        'savings_balance': savings.balance if savings else None,
+        'active_loans': [
+            {
+                'loan_id': loan.id,
+                'amount': loan.amount,
+                'status': loan.status,
+                'interest_rate': loan.interest_rate,
+                'loan_duration': loan.loan_duration,
+                'accrued_interest': loan.accrued_interest,
+                'monthly_installment': installments.get(loan.id),
+            }
+            for loan in loans
+        ],
+        'next_installment': round(sum(installments.values()), 2) if installments else None,
+    }
+
+
+def _staff_payload(user):
+    profile = user.staff
+    return {
+        'message': f'Welcome {user.username}!',
+        'employee_id': profile.employee_id if profile else None,
+        'department': profile.department if profile else None,
+    }
+
+
+def _admin_payload(user):
+    profile = user.admin
+    return {
+        'message': f'Welcome {user.username}!',
+        'access_level': profile.access_level if profile else None,
+        'is_superuser': profile.is_superuser if profile else None,
+    }
+
+
+# role -> (eager loads, payload builder); each role's dashboard is one query.
+# Loader options are built lazily because the backrefs only exist once the
+# mappers are configured.
+ROLE_VIEWS = {
+    'customer': (
+        lambda: [joinedload(User.customer).joinedload(Customer.savings_account), joinedload(User.loans)],
+        _customer_payload,
+    ),
+    'staff': (lambda: [joinedload(User.staff)], _staff_payload),
+    'admin': (lambda: [joinedload(User.admin)], _admin_payload),
+}
+
+
+def build_dashboard(user_id, role):
+    options, build = ROLE_VIEWS[role]
+    user = User.query.options(*options()).filter(User.id == user_id).first()
+    if user is None:
+        return None
+    payload = build(user)
+    etag = hashlib.sha1(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+    return etag, payload
+
 
 class DashboardResource(Resource):
     @login_required
     def get(self):
-        if current_user.role == 'customer':
-            profile = current_user.customer_profile
-            return jsonify({
-                'message': f'Welcome {current_user.username}!',
-                'account_number': profile.account_number,
-                'address': profile.address,
-                'national_id': profile.national_id
-            })
-        elif current_user.role == 'staff':
-            profile = current_user.staff_profile
-            return jsonify({
-                'message': f'Welcome {current_user.username}!',
-                'employee_id': profile.employee_id,
-                'department': profile.department
-            })
-        elif current_user.role == 'admin':
-            profile = current_user.admin_profile
-            return jsonify({
-                'message': f'Welcome {current_user.username}!',
-                'access_level': profile.access_level,
-                'is_superuser': profile.is_superuser
-            })
-        else:
-            return jsonify({'error': 'Unauthorized'}), 403
+        if current_user.role not in ROLE_VIEWS:
+            return {'error': 'Unauthorized'}, 403
+
+        cached = dashboard_cache.get(current_user.id)
+        if cached is None:
+            cached = build_dashboard(current_user.id, current_user.role)
+            if cached is None:
+                return {'error': 'Unauthorized'}, 403
+            dashboard_cache.put(current_user.id, cached)
+
+        etag, payload = cached
+        response = jsonify(payload)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response.make_conditional(request)
@@ -0,0 +1,79 @@
+import os
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+
+# DB_PROFILE=tuned (default) applies the pool and SQLite settings below;
+# DB_PROFILE=default leaves SQLAlchemy's and SQLite's own defaults alone.
+PROFILES = ('tuned', 'default')
+
+SQLITE_DEFAULTS = {
+    'journal_mode': 'WAL',       # readers don't block the writer
+    'synchronous': 'NORMAL',     # durable at checkpoints; safe with WAL
+    'busy_timeout': '5000',      # ms to wait for the write lock instead of failing
+    'mmap_size': '268435456',    # 256 MiB of memory-mapped reads
+}
+
+
+def _env(name, default, cast=str):
+    value = os.environ.get(name)
+    return cast(value) if value not in (None, '') else default
+
+
+def _env_bool(value):
+    return value.lower() in ('1', 'true', 'yes', 'on')
+
+
+def is_sqlite(uri):
+    return make_url(uri).get_backend_name() == 'sqlite'
+
+
+def is_sqlite_memory(uri):
+    return is_sqlite(uri) and make_url(uri).database in (None, '', ':memory:')
+
+
+def configure(app):
+    # Must run before db.init_app, which creates the engine from this config.
+    # Values passed to create_app take precedence over the environment.
+    uri = app.config.get('SQLALCHEMY_DATABASE_URI') or _env('DATABASE_URL', 'sqlite:///app.db')
+    profile = app.config.get('DB_PROFILE') or _env('DB_PROFILE', 'tuned')
+    if profile not in PROFILES:
+        raise ValueError(f'Unknown DB_PROFILE {profile!r}, expected one of {PROFILES}')
+
+    app.config['SQLALCHEMY_DATABASE_URI'] = uri
+    app.config['DB_PROFILE'] = profile
+    app.config['SQLITE_PRAGMAS'] = {}
+    if profile == 'default':
+        return
+
+    options = {
+        'pool_pre_ping': _env('DB_POOL_PRE_PING', True, _env_bool),
+        'pool_recycle': _env('DB_POOL_RECYCLE', 1800, int),
+    }
+    if not is_sqlite_memory(uri):
+        # In-memory SQLite uses a single shared connection, so no pool sizing
+        options.update({
+            'pool_size': _env('DB_POOL_SIZE', 10, int),
+            'max_overflow': _env('DB_MAX_OVERFLOW', 20, int),
+            'pool_timeout': _env('DB_POOL_TIMEOUT', 30, int),
+        })
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {**options, **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})}
+
+    if is_sqlite(uri):
+        app.config['SQLITE_PRAGMAS'] = {
+            pragma: _env(f'DB_SQLITE_{pragma.upper()}', value) for pragma, value in SQLITE_DEFAULTS.items()
+        }
+
+
+def install(app, engine):
+    pragmas = app.config.get('SQLITE_PRAGMAS')
+    if not pragmas or engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma, value in pragmas.items():
+            cursor.execute(f'PRAGMA {pragma}={value}')
+        cursor.close()
@@ -0,0 +1,92 @@
+import csv
+import io
+import json
+import sys
+import zlib
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import select
+
+from models import db, Loan, Customer, SavingsAccount
+
+
+TABLES = {
+    'loans': Loan.__table__,
+    'customers': Customer.__table__,
+    'savings_account': SavingsAccount.__table__,
+}
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+CHUNK_SIZE = 1000
+
+
+def iter_partitions(table, chunk_size=CHUNK_SIZE):
+    # yield_per + stream_results keeps a server-side cursor open (where the
+    # driver has one) and hands back fixed-size batches, so memory is flat.
+    result = db.session.execute(
+        select(table).order_by(*table.primary_key.columns),
+        execution_options={'yield_per': chunk_size, 'stream_results': True},
+    )
+    return result.partitions()
+
+
+def iter_ndjson(table, chunk_size=CHUNK_SIZE):
+    keys = [column.key for column in table.columns]
+    for rows in iter_partitions(table, chunk_size):
+        yield ''.join(json.dumps(dict(zip(keys, row)), default=str) + '\n' for row in rows)
+
+
+def iter_csv(table, chunk_size=CHUNK_SIZE):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([column.key for column in table.columns])
+    for rows in iter_partitions(table, chunk_size):
+        writer.writerows(rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def iter_export(name, fmt, compress=False, chunk_size=CHUNK_SIZE):
+    table = TABLES[name]
+    chunks = iter_ndjson(table, chunk_size) if fmt == 'ndjson' else iter_csv(table, chunk_size)
+    if not compress:
+        return (chunk.encode() for chunk in chunks)
+    return gzip_chunks(chunk.encode() for chunk in chunks)
+
+
+def gzip_chunks(chunks, level=6):
+    # wbits=31 writes a gzip header/trailer, so the stream is a valid .gz file
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def filename(name, fmt, compress=False):
+    return f'{name}.{fmt}' + ('.gz' if compress else '')
+
+
+@click.command('export')
+@click.argument('table', type=click.Choice(sorted(TABLES)))
+@click.option('--format', 'fmt', type=click.Choice(sorted(FORMATS)), default='ndjson', show_default=True)
+@click.option('--gzip', 'compress', is_flag=True, help='Gzip-compress the output.')
+@click.option('--output', '-o', type=click.Path(dir_okay=False), help='Output file (default: stdout).')
+@click.option('--chunk-size', default=CHUNK_SIZE, show_default=True)
+@with_appcontext
+def export_command(table, fmt, compress, output, chunk_size):
+    """Stream a full table dump as NDJSON or CSV."""
+    out = open(output, 'wb') if output else sys.stdout.buffer
+    try:
+        for chunk in iter_export(table, fmt, compress, chunk_size):
+            out.write(chunk)
+    finally:
+        if output:
+            out.close()
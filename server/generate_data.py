@@ -0,0 +1,245 @@
+"""Bulk synthetic data generator for load-test databases.
+
+    python generate_data.py --users 1000000 --chunk-size 20000 --drop
+
+Rows are written with executemany inserts, one transaction per chunk, and
+every user shares a small pool of precomputed password hashes.
+"""
+import argparse
+import random
+import time
+from datetime import datetime
+
+from sqlalchemy import func, insert, select, text
+from werkzeug.security import generate_password_hash
+
+from app import create_app
+import portfolio
+from search_index import customer_search
+from models import db, User, Customer, Staff, Admin, Loan, LoanSettings, SavingsAccount, SavingsTransaction, to_minor
+
+
+DEFAULTS = {
+    'roles': 'customer=0.97,staff=0.025,admin=0.005',
+    'loans_per_customer': '0=0.35,1=0.45,2=0.15,3=0.05',
+    'loan_status': 'pending=0.25,approved=0.55,rejected=0.1,repaid=0.1',
+    'loan_duration': '6=0.15,12=0.4,24=0.3,36=0.15',
+}
+
+DEPARTMENTS = ['Loans', 'Savings', 'Operations', 'Customer Service']
+
+
+def parse_weights(spec, cast=str):
+    # "pending=0.3,approved=0.7" -> (['pending', 'approved'], [0.3, 0.7])
+    values, weights = [], []
+    for part in spec.split(','):
+        key, _, weight = part.partition('=')
+        values.append(cast(key.strip()))
+        weights.append(float(weight))
+    if not values or sum(weights) <= 0:
+        raise ValueError(f'Invalid distribution: {spec!r}')
+    return values, weights
+
+
+class Distributions:
+    def __init__(self, args):
+        self.roles = parse_weights(args.roles)
+        self.loans_per_customer = parse_weights(args.loans_per_customer, int)
+        self.loan_status = parse_weights(args.loan_status)
+        self.loan_duration = parse_weights(args.loan_duration, int)
+        self.loan_amount_median = args.loan_amount_median
+        self.loan_amount_sigma = args.loan_amount_sigma
+        self.balance_median = args.balance_median
+        self.balance_sigma = args.balance_sigma
+        self.interest_rate = args.interest_rate
+        self.interest_rate_spread = args.interest_rate_spread
+
+
+class Pools:
+    # Faker is far too slow to call once per row, so names and addresses are
+    # drawn from pools and made unique by suffixing the row id.
+    def __init__(self, faker, size):
+        self.first_names = [faker.first_name().lower() for _ in range(size)]
+        self.last_names = [faker.last_name().lower() for _ in range(size)]
+        self.addresses = [faker.street_address()[:200] for _ in range(size)]
+        self.domains = [faker.free_email_domain() for _ in range(min(size, 50))]
+
+
+class Stats:
+    def __init__(self):
+        self.counts = {}
+        self.started = time.perf_counter()
+
+    def add(self, table, rows):
+        self.counts[table] = self.counts.get(table, 0) + rows
+
+    @property
+    def total(self):
+        return sum(self.counts.values())
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def rate(self):
+        return self.total / self.elapsed if self.elapsed else 0.0
+
+
+def lognormal(rng, median, sigma):
+    return round(median * rng.lognormvariate(0, sigma), 2)
+
+
+def build_chunk(rng, pools, dist, hashes, first_user_id, first_savings_id, size, now):
+    users, customers, staffs, admins, savings, ledger, loans = [], [], [], [], [], [], []
+    roles = rng.choices(*dist.roles, k=size)
+    savings_id = first_savings_id
+
+    for offset, role in enumerate(roles):
+        user_id = first_user_id + offset
+        first = rng.choice(pools.first_names)
+        last = rng.choice(pools.last_names)
+        users.append({
+            'id': user_id,
+            'username': f'{first}.{last}{user_id}'[:50],
+            'email': f'{first}.{last}{user_id}@{rng.choice(pools.domains)}'[:100],
+            'password_hash': rng.choice(hashes),
+            'role': role,
+        })
+
+        if role == 'customer':
+            customers.append({
+                'id': user_id,
+                'account_number': f'C{user_id:010d}',
+                'address': rng.choice(pools.addresses),
+                'national_id': f'{rng.randrange(10 ** 9, 10 ** 10)}',
+            })
+            balance_minor = to_minor(lognormal(rng, dist.balance_median, dist.balance_sigma))
+            savings.append({'id': savings_id, 'customer_id': user_id, 'balance_minor': balance_minor})
+            # Opening entry so ledger replays and snapshots add up to the balance
+            ledger.append({
+                'account_id': savings_id,
+                'kind': 'opening_balance',
+                'amount_minor': balance_minor,
+                'created_at': now,
+            })
+            savings_id += 1
+
+            for _ in range(rng.choices(*dist.loans_per_customer)[0]):
+                status = rng.choices(*dist.loan_status)[0]
+                loans.append({
+                    'customer_id': user_id,
+                    'amount': 0.0 if status == 'repaid' else lognormal(rng, dist.loan_amount_median, dist.loan_amount_sigma),
+                    'status': status,
+                    'interest_rate': round(dist.interest_rate + rng.uniform(-1, 1) * dist.interest_rate_spread, 2),
+                    'loan_duration': rng.choices(*dist.loan_duration)[0],
+                })
+        elif role == 'staff':
+            staffs.append({
+                'id': user_id,
+                'employee_id': f'S{user_id:08d}',
+                'department': rng.choice(DEPARTMENTS),
+            })
+        else:
+            admins.append({'id': user_id, 'access_level': 'full', 'is_superuser': False})
+
+    # Parents first so foreign keys resolve within the chunk's transaction
+    return [
+        (User, users),
+        (Customer, customers),
+        (Staff, staffs),
+        (Admin, admins),
+        (SavingsAccount, savings),
+        (SavingsTransaction, ledger),
+        (Loan, loans),
+    ]
+
+
+def next_id(conn, model):
+    return (conn.execute(select(func.max(model.id))).scalar() or 0) + 1
+
+
+def generate(args, app=None):
+    # Faker takes longer to import than the rest of the app; load it only to generate
+    from faker import Faker
+
+    app = app or create_app()
+    rng = random.Random(args.seed)
+    faker = Faker(args.locale)
+    faker.seed_instance(args.seed)
+    dist = Distributions(args)
+
+    pools = Pools(faker, args.pool_size)
+    hashes = [generate_password_hash(args.password) for _ in range(args.hash_pool)]
+
+    with app.app_context():
+        if args.drop:
+            db.drop_all()
+        db.create_all()
+
+        with db.engine.connect() as conn:
+            if conn.dialect.name == 'sqlite':
+                # Only affects this connection; a crash mid-load loses the
+                # current chunk, which a throwaway load-test database can afford.
+                conn.execute(text('PRAGMA synchronous=OFF'))
+
+            if conn.execute(select(func.count()).select_from(LoanSettings)).scalar() == 0:
+                conn.execute(insert(LoanSettings), [{'default_interest_rate': args.interest_rate}])
+                conn.commit()
+
+            user_id = next_id(conn, User)
+            savings_id = next_id(conn, SavingsAccount)
+            stats = Stats()
+            remaining = args.users
+
+            while remaining > 0:
+                size = min(args.chunk_size, remaining)
+                chunk = build_chunk(rng, pools, dist, hashes, user_id, savings_id, size, datetime.utcnow())
+                for model, rows in chunk:
+                    if rows:
+                        conn.execute(insert(model), rows)
+                        stats.add(model.__tablename__, len(rows))
+                conn.commit()
+
+                user_id += size
+                savings_id += len(dict(chunk)[SavingsAccount])
+                remaining -= size
+                if not args.quiet:
+                    print(f'{args.users - remaining}/{args.users} users, '
+                          f'{stats.total} rows, {stats.rate():,.0f} rows/sec')
+
+        # Bulk inserts bypass the incremental portfolio updates and search hooks
+        portfolio.rebuild()
+        customer_search.changed()
+
+    print(f'Inserted {stats.total} rows in {stats.elapsed:.2f}s ({stats.rate():,.0f} rows/sec)')
+    for table, count in stats.counts.items():
+        print(f'  {table}: {count}')
+    return stats
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='Generate synthetic users, customers, savings and loans.')
+    parser.add_argument('--users', type=int, default=10000)
+    parser.add_argument('--chunk-size', type=int, default=10000)
+    parser.add_argument('--drop', action='store_true', help='drop and recreate all tables first')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--locale', default='en_US')
+    parser.add_argument('--password', default='password1234', help='password shared by every generated user')
+    parser.add_argument('--hash-pool', type=int, default=4, help='number of distinct precomputed hashes')
+    parser.add_argument('--pool-size', type=int, default=2000, help='size of the Faker name/address pools')
+    parser.add_argument('--roles', default=DEFAULTS['roles'])
+    parser.add_argument('--loans-per-customer', default=DEFAULTS['loans_per_customer'])
+    parser.add_argument('--loan-status', default=DEFAULTS['loan_status'])
+    parser.add_argument('--loan-duration', default=DEFAULTS['loan_duration'])
+    parser.add_argument('--loan-amount-median', type=float, default=5000.0)
+    parser.add_argument('--loan-amount-sigma', type=float, default=0.8)
+    parser.add_argument('--balance-median', type=float, default=1000.0)
+    parser.add_argument('--balance-sigma', type=float, default=1.2)
+    parser.add_argument('--interest-rate', type=float, default=5.5)
+    parser.add_argument('--interest-rate-spread', type=float, default=1.5)
+    parser.add_argument('--quiet', action='store_true')
+    return parser
+
+
+if __name__ == '__main__':
+    generate(build_parser().parse_args())
@@ -0,0 +1,91 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from flask import current_app
+from werkzeug.local import LocalProxy
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+class HashingBusy(Exception):
+    def __init__(self, retry_after):
+        super().__init__('Password hashing capacity exhausted')
+        self.retry_after = retry_after
+
+
+class PasswordHasher:
+    # PBKDF2 in hashlib releases the GIL, so a small thread pool gives real
+    # parallelism while capping how many request threads can be stuck in
+    # hashing at once. Work beyond workers + queue_size is rejected
+    # immediately rather than queued without bound.
+    def __init__(self, workers=2, queue_size=16, method='pbkdf2:sha256:260000', salt_length=16,
+                 timeout=10.0, retry_after=1):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.method = method
+        self.salt_length = salt_length
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self._executor = None
+        self._slots = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.workers = app.config.get('PASSWORD_HASH_WORKERS', self.workers)
+        self.queue_size = app.config.get('PASSWORD_HASH_QUEUE_SIZE', self.queue_size)
+        self.method = app.config.get('PASSWORD_HASH_METHOD', self.method)
+        self.salt_length = app.config.get('PASSWORD_SALT_LENGTH', self.salt_length)
+        self.timeout = app.config.get('PASSWORD_HASH_TIMEOUT', self.timeout)
+        self.retry_after = app.config.get('PASSWORD_HASH_RETRY_AFTER', self.retry_after)
+
+    def _ensure_executor(self):
+        # Created lazily so each forked gunicorn worker gets its own threads
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._slots = threading.BoundedSemaphore(self.workers + self.queue_size)
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='hasher')
+        return self._executor
+
+    def _run(self, fn, *args, **kwargs):
+        executor = self._ensure_executor()
+        if not self._slots.acquire(blocking=False):
+            raise HashingBusy(self.retry_after)
+        try:
+            future = executor.submit(fn, *args, **kwargs)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            raise HashingBusy(self.retry_after)
+
+    def generate(self, password):
+        # Hash on the calling thread; for batch jobs that manage their own pool
+        return generate_password_hash(password, method=self.method, salt_length=self.salt_length)
+
+    def hash(self, password):
+        return self._run(self.generate, password)
+
+    def verify(self, password_hash, password):
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        # Werkzeug format: "<method>$<salt>$<hash>"
+        method, _, rest = password_hash.partition('$')
+        salt = rest.partition('$')[0]
+        return method != self.method or len(salt) != self.salt_length
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+def init_app(app):
+    app.extensions['password_hasher'] = instance = PasswordHasher()
+    instance.init_app(app)
+
+
+password_hasher = LocalProxy(lambda: current_app.extensions['password_hasher'])
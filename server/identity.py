@@ -0,0 +1,86 @@
+import os
+
+from flask import current_app
+from flask_login import UserMixin
+from werkzeug.local import LocalProxy
+
+from cache import LRUCache, read_signal, touch_signal
+from models import db, User, Customer, SavingsAccount
+
+
+class Principal(UserMixin):
+    # Detached identity for Flask-Login; holds only the ids handlers need
+    # so cached entries never touch a session.
+    def __init__(self, id, username, role, customer_id=None, savings_account_id=None):
+        self.id = id
+        self.username = username
+        self.role = role
+        self.customer_id = customer_id
+        self.savings_account_id = savings_account_id
+
+    @property
+    def user(self):
+        # Full row for the rare handler that needs more than the ids
+        return db.session.get(User, self.id)
+
+    def __repr__(self):
+        return f'<Principal {self.id} {self.role}>'
+
+
+class IdentityCache(LRUCache):
+    # Per worker, so a role change or deletion must reach the others before
+    # IDENTITY_CACHE_TTL: evict() bumps a shared signal file, and a worker
+    # that sees a new mtime drops every cached principal. Revocations are
+    # rare, so losing the whole cache then costs little.
+    def __init__(self, maxsize=10000, ttl=60, signal_path=None):
+        super().__init__(maxsize, ttl)
+        self.signal_path = signal_path
+        self._signal = None
+
+    def init_app(self, app):
+        self.maxsize = app.config.get('IDENTITY_CACHE_SIZE', self.maxsize)
+        self.ttl = app.config.get('IDENTITY_CACHE_TTL', self.ttl)
+        self.signal_path = app.config.get(
+            'IDENTITY_SIGNAL_FILE', os.path.join(app.instance_path, 'identity.version')
+        )
+        self._signal = read_signal(self.signal_path)
+
+    def get(self, key):
+        signal = read_signal(self.signal_path)
+        if signal != self._signal:
+            self.clear()
+            self._signal = signal
+        return super().get(key)
+
+    def evict(self, key, broadcast=True):
+        # Call after the change is committed
+        super().evict(key)
+        if broadcast and self.signal_path:
+            touch_signal(self.signal_path)
+
+
+def load_principal(user_id):
+    row = db.session.query(User.id, User.username, User.role, Customer.id, SavingsAccount.id) \
+        .outerjoin(Customer, Customer.id == User.id) \
+        .outerjoin(SavingsAccount, SavingsAccount.customer_id == Customer.id) \
+        .filter(User.id == user_id).first()
+    if row is None:
+        return None
+    return Principal(*row)
+
+
+def init_app(app):
+    app.extensions['identity_cache'] = instance = IdentityCache()
+    instance.init_app(app)
+
+
+identity_cache = LocalProxy(lambda: current_app.extensions['identity_cache'])
+
+
+def get_principal(user_id):
+    principal = identity_cache.get(user_id)
+    if principal is None:
+        principal = load_principal(user_id)
+        if principal is not None:
+            identity_cache.put(principal.id, principal)
+    return principal
@@ -0,0 +1,245 @@
+import logging
+import multiprocessing
+import os
+import random
+import signal
+import socket
+import threading
+import traceback
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import func, select, update
+
+from models import db, Job
+from audit import audit_log
+
+
+logger = logging.getLogger(__name__)
+
+HANDLERS = {}
+
+
+def handler(kind):
+    # Register fn(payload) as the handler for jobs of this kind. It runs in
+    # the transaction that marks the job done, so it must not commit; it may
+    # return a callable to run after that commit (cache eviction, audit).
+    # Delivery is at-least-once, so handlers must tolerate running twice.
+    def register(fn):
+        HANDLERS[kind] = fn
+        return fn
+    return register
+
+
+def enqueue(kind, payload, delay=0, max_attempts=None):
+    # Joins the caller's transaction: the job exists only if the caller commits
+    if kind not in HANDLERS:
+        raise ValueError(f'No handler registered for job kind {kind!r}')
+    job = Job(
+        kind=kind, payload=payload, status='queued', attempts=0,
+        max_attempts=max_attempts or current_app.config.get('JOB_MAX_ATTEMPTS', 5),
+        run_at=datetime.utcnow() + timedelta(seconds=delay),
+    )
+    db.session.add(job)
+    return job
+
+
+def _claim_skip_locked(worker_id, limit, now):
+    # Postgres/MySQL: rows locked by another worker's claim are skipped, not waited on
+    ids = db.session.execute(
+        select(Job.id).where(Job.status == 'queued', Job.run_at <= now)
+        .order_by(Job.run_at, Job.id).limit(limit).with_for_update(skip_locked=True)
+    ).scalars().all()
+    if ids:
+        db.session.execute(
+            update(Job).where(Job.id.in_(ids))
+            .values(status='running', locked_by=worker_id, locked_at=now, attempts=Job.attempts + 1)
+            .execution_options(synchronize_session=False)
+        )
+    db.session.commit()
+    return ids
+
+
+def _claim_optimistic(worker_id, limit, now):
+    # SQLite: pick candidates without locking, then keep only the rows our
+    # guarded UPDATE actually flipped from queued to running
+    candidates = db.session.execute(
+        select(Job.id).where(Job.status == 'queued', Job.run_at <= now).order_by(Job.run_at, Job.id).limit(limit)
+    ).scalars().all()
+    if not candidates:
+        db.session.rollback()
+        return []
+    stmt = update(Job).where(Job.id.in_(candidates), Job.status == 'queued') \
+        .values(status='running', locked_by=worker_id, locked_at=now, attempts=Job.attempts + 1) \
+        .execution_options(synchronize_session=False)
+    if db.engine.dialect.update_returning:
+        ids = db.session.execute(stmt.returning(Job.id)).scalars().all()
+    else:
+        ids = [job_id for job_id in candidates if db.session.execute(stmt.where(Job.id == job_id)).rowcount]
+    db.session.commit()
+    return ids
+
+
+def claim(worker_id, limit=10):
+    now = datetime.utcnow()
+    if db.engine.dialect.name == 'sqlite':
+        return _claim_optimistic(worker_id, limit, now)
+    return _claim_skip_locked(worker_id, limit, now)
+
+
+def requeue_stale(lease_seconds):
+    # Jobs whose worker died mid-run go back to the queue (or fail if out of attempts)
+    cutoff = datetime.utcnow() - timedelta(seconds=lease_seconds)
+    stale = (Job.status == 'running') & (Job.locked_at < cutoff)
+    failed = db.session.execute(
+        update(Job).where(stale, Job.attempts >= Job.max_attempts)
+        .values(status='failed', last_error='Lease expired', finished_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    requeued = db.session.execute(
+        update(Job).where(stale).values(status='queued', locked_by=None, locked_at=None)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.session.commit()
+    return requeued, failed
+
+
+def backoff(attempts, base):
+    # Exponential with full jitter: attempt n waits up to base * 2**(n-1) seconds
+    return random.uniform(0, base * 2 ** (attempts - 1))
+
+
+def run_job(job_id, worker_id):
+    job = db.session.get(Job, job_id)
+    if job is None or job.status != 'running' or job.locked_by != worker_id:
+        return None
+    kind, payload = job.kind, job.payload
+    db.session.rollback()
+
+    try:
+        fn = HANDLERS.get(kind)
+        if fn is None:
+            raise LookupError(f'No handler registered for job kind {kind!r}')
+        after_commit = fn(payload)
+        # The handler's changes and the job's completion commit together, so
+        # a crash can't leave finished work queued for another run
+        finished = db.session.execute(
+            update(Job).where(Job.id == job_id, Job.status == 'running', Job.locked_by == worker_id)
+            .values(status='done', locked_by=None, finished_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if not finished:
+            db.session.rollback()
+            logger.warning('Job %s (%s) lease was lost; discarding this run', job_id, kind)
+            return None
+        db.session.commit()
+    except Exception as exc:
+        db.session.rollback()
+        job = db.session.get(Job, job_id)
+        job.last_error = ''.join(traceback.format_exception_only(type(exc), exc)).strip()
+        job.locked_by = job.locked_at = None
+        if job.attempts >= job.max_attempts:
+            job.status = 'failed'
+            job.finished_at = datetime.utcnow()
+        else:
+            job.status = 'queued'
+            job.run_at = datetime.utcnow() + timedelta(
+                seconds=backoff(job.attempts, current_app.config.get('JOB_BACKOFF_BASE', 5)))
+        db.session.commit()
+        logger.warning('Job %s (%s) attempt %s failed: %s', job_id, kind, job.attempts, job.last_error)
+        return job.status
+
+    if after_commit is not None:
+        after_commit()
+    return 'done'
+
+
+def work(worker_id, stop, batch_size=10, poll_interval=1.0, burst=False):
+    lease = current_app.config.get('JOB_LEASE_SECONDS', 300)
+    processed = 0
+    next_reap = datetime.min
+    while not stop.is_set():
+        if datetime.utcnow() >= next_reap:
+            requeue_stale(lease)
+            next_reap = datetime.utcnow() + timedelta(seconds=lease / 10)
+        job_ids = claim(worker_id, batch_size)
+        if not job_ids:
+            if burst:
+                break
+            stop.wait(poll_interval)
+            continue
+        for job_id in job_ids:
+            run_job(job_id, worker_id)
+            processed += 1
+        db.session.remove()
+    return processed
+
+
+def _watch(parent_pid, stop, terminate):
+    # Stops the workers after their current job on SIGTERM or once the
+    # parent is gone (even by SIGKILL). The shared event is set from this
+    # thread: set() inside a signal handler deadlocks with the wait() it interrupted.
+    while not terminate.wait(1):
+        if stop.is_set() or os.getppid() != parent_pid:
+            break
+    stop.set()
+
+
+def _worker_process(app, index, stop, parent_pid, batch_size, poll_interval, burst):
+    # Ctrl-C reaches the whole process group; let the parent's stop event
+    # end the loop between jobs instead
+    terminate = threading.Event()
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda signum, frame: terminate.set())
+    threading.Thread(target=_watch, args=(parent_pid, stop, terminate), name='jobs-watch', daemon=True).start()
+    with app.app_context():
+        db.engine.dispose(close=False)
+        try:
+            work(f'{socket.gethostname()}:{os.getpid()}:{index}', stop, batch_size, poll_interval, burst)
+        finally:
+            # Forked children exit without running atexit hooks
+            audit_log.shutdown()
+
+
+jobs_cli = AppGroup('jobs', help='Background job queue.')
+
+
+@jobs_cli.command('work')
+@click.option('--processes', default=2, show_default=True)
+@click.option('--batch-size', default=10, show_default=True, help='Jobs claimed per round trip.')
+@click.option('--poll-interval', default=1.0, show_default=True)
+@click.option('--burst', is_flag=True, help='Exit once the queue is empty.')
+def work_command(processes, batch_size, poll_interval, burst):
+    """Run job worker processes until interrupted."""
+    app = current_app._get_current_object()
+    context = multiprocessing.get_context('fork')
+    stop = context.Event()
+
+    def request_stop(signum, frame):
+        click.echo('Stopping workers after their current job ...', err=True)
+        stop.set()
+
+    signal.signal(signal.SIGINT, request_stop)
+    signal.signal(signal.SIGTERM, request_stop)
+
+    workers = [
+        context.Process(target=_worker_process, args=(app, index, stop, os.getpid(), batch_size, poll_interval, burst),
+                        name=f'jobs-worker-{index}')
+        for index in range(processes)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+
+@jobs_cli.command('status')
+def status_command():
+    """Show job counts by kind and status."""
+    rows = db.session.execute(
+        select(Job.kind, Job.status, func.count(Job.id)).group_by(Job.kind, Job.status).order_by(Job.kind, Job.status)
+    ).all()
+    for kind, status, count in rows:
+        click.echo(f'{kind:24} {status:8} {count}')
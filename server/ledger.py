@@ -0,0 +1,99 @@
+from datetime import datetime
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import func, insert, literal, select, update
+
+from models import db, SavingsAccount, SavingsTransaction, SavingsSnapshot
+
+
+class InsufficientFunds(Exception):
+    pass
+
+
+def post_entry(account_id, amount_minor, kind, reference=None):
+    # One conditional UPDATE moves the balance, so concurrent writers can't
+    # lose updates or overdraw; the ledger row joins the same transaction.
+    stmt = update(SavingsAccount).where(SavingsAccount.id == account_id)
+    if amount_minor < 0:
+        stmt = stmt.where(SavingsAccount.balance_minor >= -amount_minor)
+    stmt = stmt.values(balance_minor=SavingsAccount.balance_minor + amount_minor, version=SavingsAccount.version + 1) \
+        .execution_options(synchronize_session=False)
+
+    if db.session.execute(stmt).rowcount == 0:
+        raise InsufficientFunds(account_id)
+
+    db.session.add(SavingsTransaction(
+        account_id=account_id, kind=kind, amount_minor=amount_minor, reference=reference
+    ))
+    return db.session.execute(
+        select(SavingsAccount.balance_minor).where(SavingsAccount.id == account_id)
+    ).scalar_one()
+
+
+def balance_at(account_id, until):
+    # Latest snapshot taken by `until`, plus only the entries after it
+    snapshot = SavingsSnapshot.query \
+        .filter(SavingsSnapshot.account_id == account_id, SavingsSnapshot.created_at <= until) \
+        .order_by(SavingsSnapshot.id.desc()).first()
+    base, after_id = (snapshot.balance_minor, snapshot.transaction_id) if snapshot else (0, 0)
+
+    delta = db.session.query(func.coalesce(func.sum(SavingsTransaction.amount_minor), 0)).filter(
+        SavingsTransaction.account_id == account_id,
+        SavingsTransaction.id > after_id,
+        SavingsTransaction.created_at <= until,
+    ).scalar()
+    return base + delta
+
+
+def statement(account_id, start, end):
+    opening = balance_at(account_id, start)
+    entries = SavingsTransaction.query.filter(
+        SavingsTransaction.account_id == account_id,
+        SavingsTransaction.created_at > start,
+        SavingsTransaction.created_at <= end,
+    ).order_by(SavingsTransaction.id).all()
+
+    running = opening
+    rows = []
+    for entry in entries:
+        running += entry.amount_minor
+        rows.append((entry, running))
+    return opening, rows, running
+
+
+def snapshot_balances(min_entries=1):
+    # Set-based: previous snapshot + entries since, for every account with
+    # at least `min_entries` new ledger rows.
+    latest_id = select(SavingsSnapshot.account_id, func.max(SavingsSnapshot.id).label('id')) \
+        .group_by(SavingsSnapshot.account_id).subquery()
+    latest = select(SavingsSnapshot).join(latest_id, SavingsSnapshot.id == latest_id.c.id).subquery()
+
+    t = SavingsTransaction.__table__
+    new_snapshots = select(
+        t.c.account_id,
+        func.max(t.c.id),
+        func.coalesce(func.max(latest.c.balance_minor), 0) + func.sum(t.c.amount_minor),
+        literal(datetime.utcnow(), SavingsSnapshot.created_at.type),
+    ).select_from(t).outerjoin(latest, latest.c.account_id == t.c.account_id) \
+        .where(t.c.id > func.coalesce(latest.c.transaction_id, 0)) \
+        .group_by(t.c.account_id) \
+        .having(func.count(t.c.id) >= min_entries)
+
+    result = db.session.execute(insert(SavingsSnapshot).from_select(
+        ['account_id', 'transaction_id', 'balance_minor', 'created_at'], new_snapshots
+    ))
+    db.session.commit()
+    return result.rowcount
+
+
+savings_cli = AppGroup('savings', help='Savings ledger maintenance.')
+
+
+@savings_cli.command('snapshot')
+@click.option('--min-entries', default=1, show_default=True,
+              help='Only snapshot accounts with at least this many new ledger entries.')
+def snapshot_command(min_entries):
+    """Record balance snapshots so statements don't replay the whole ledger."""
+    count = snapshot_balances(min_entries)
+    click.echo(f'Snapshotted {count} savings accounts.')
@@ -0,0 +1,329 @@
+"""Concurrent load test and benchmark harness for the API.
+
+    python loadtest.py --users 20000 --concurrency 8 --requests 2000 --output report.json
+    python loadtest.py --skip-seed --compare report.json
+
+Runs the app in-process against its own SQLite database, seeded with
+generate_data.py, and drives each scenario from a pool of threads with one
+test client (and session cookie) per thread. Latency percentiles, throughput
+and SQL statement counts are recorded per endpoint and written as JSON.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+
+PASSWORD = 'loadtest1234'
+BATCH_SIZE = 50
+
+# Pending loans decided per request. Each approval scenario gets a pool of
+# its own, inserted just before it runs, so one can't drain the other's and
+# a rerun with --skip-seed still finds work.
+LOAN_POOLS = {'approval_queue': 1, 'approval_batch': BATCH_SIZE}
+
+_local = threading.local()
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class EndpointStats:
+    def __init__(self):
+        self.latencies = []
+        self.queries = []
+        self.statuses = {}
+
+    def record(self, elapsed, queries, status):
+        self.latencies.append(elapsed)
+        self.queries.append(queries)
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+
+    def summary(self, wall_time):
+        latencies = sorted(self.latencies)
+        count = len(latencies)
+        errors = sum(n for status, n in self.statuses.items() if status >= 500)
+        return {
+            'requests': count,
+            'errors': errors,
+            'statuses': {str(status): n for status, n in sorted(self.statuses.items())},
+            'throughput_rps': round(count / wall_time, 2) if wall_time else 0.0,
+            'latency_ms': {
+                'mean': round(sum(latencies) / count * 1000, 3) if count else 0.0,
+                'p50': round(percentile(latencies, 50) * 1000, 3),
+                'p95': round(percentile(latencies, 95) * 1000, 3),
+                'p99': round(percentile(latencies, 99) * 1000, 3),
+                'max': round(latencies[-1] * 1000, 3) if count else 0.0,
+            },
+            'queries': {
+                'mean': round(sum(self.queries) / count, 2) if count else 0.0,
+                'max': max(self.queries) if count else 0,
+            },
+        }
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.endpoints = {}
+
+    def call(self, client, endpoint, method, url, **kwargs):
+        _local.queries = 0
+        started = time.perf_counter()
+        response = client.open(url, method=method, **kwargs)
+        elapsed = time.perf_counter() - started
+        with self.lock:
+            self.endpoints.setdefault(endpoint, EndpointStats()).record(elapsed, _local.queries, response.status_code)
+        return response
+
+
+def count_queries(conn, cursor, statement, parameters, context, executemany):
+    _local.queries = getattr(_local, 'queries', 0) + 1
+
+
+class Fixtures:
+    # Ids sampled once up front so scenarios don't skew the query counts
+    def __init__(self, db, User, Loan):
+        self.db, self.Loan = db, Loan
+        customers = db.session.query(User.id, User.email).filter_by(role='customer').limit(5000).all()
+        self.customers = [email for _, email in customers]
+        self.customer_ids = [user_id for user_id, _ in customers]
+        self.staff = [email for email, in db.session.query(User.email).filter(User.role.in_(['staff', 'admin'])).limit(100)]
+        # Customers poll only their own loans, as the app does
+        self.loans_by_customer = {email: [] for email in self.customers}
+        for email, loan_id in db.session.query(User.email, Loan.id).join(Loan, Loan.customer_id == User.id) \
+                .filter(User.id.in_(self.customer_ids)):
+            self.loans_by_customer[email].append(loan_id)
+        self.pending_loans = {}
+        self.pending_lock = threading.Lock()
+
+    def seed_pending_loans(self, scenario, count, rng):
+        from sqlalchemy import insert
+        from models import LoanSettings
+        import portfolio
+
+        rate = LoanSettings.query.first().default_interest_rate
+        rows = [
+            {'amount': round(rng.uniform(500, 20000), 2), 'interest_rate': rate,
+             'loan_duration': rng.choice([6, 12, 24]), 'status': 'pending', 'customer_id': rng.choice(self.customer_ids)}
+            for _ in range(count)
+        ]
+        self.pending_loans[scenario] = self.db.session.execute(
+            insert(self.Loan).returning(self.Loan.id, sort_by_parameter_order=True), rows
+        ).scalars().all()
+        portfolio.record_new_loans([(row['amount'], row['loan_duration']) for row in rows])
+        self.db.session.commit()
+
+    def next_pending_loan(self, scenario):
+        with self.pending_lock:
+            pool = self.pending_loans.get(scenario)
+            return pool.pop() if pool else None
+
+
+def login(recorder, client, email):
+    return recorder.call(client, 'Login', 'POST', '/api/login', json={'email': email, 'password': PASSWORD})
+
+
+def login_storm(recorder, client, fixtures, rng):
+    login(recorder, client, rng.choice(fixtures.customers))
+
+
+def login_customer(recorder, client, fixtures, rng):
+    if not getattr(client, 'logged_in', False):
+        email = rng.choice(fixtures.customers)
+        login(recorder, client, email)
+        client.logged_in = True
+        client.loan_ids = list(fixtures.loans_by_customer[email])
+
+
+def savings_burst(recorder, client, fixtures, rng):
+    login_customer(recorder, client, fixtures, rng)
+    roll = rng.random()
+    if roll < 0.4:
+        recorder.call(client, 'Savings.get', 'GET', '/api/savings')
+    else:
+        action = 'deposit' if roll < 0.75 else 'withdraw'
+        recorder.call(client, 'Savings.post', 'POST', '/api/savings',
+                      json={'action': action, 'amount': round(rng.uniform(1, 200), 2)})
+
+
+def approval_queue(recorder, client, fixtures, rng):
+    if not getattr(client, 'logged_in', False):
+        login(recorder, client, rng.choice(fixtures.staff))
+        client.logged_in = True
+    loan_id = fixtures.next_pending_loan('approval_queue')
+    if loan_id is None:
+        recorder.call(client, 'DashboardResource', 'GET', '/api/dashboard')
+        return
+    status = 'approved' if rng.random() < 0.8 else 'rejected'
+    recorder.call(client, 'LoanManagement', 'PUT', f'/api/loan/{loan_id}/manage', json={'status': status})
+
+
+def approval_batch(recorder, client, fixtures, rng):
+    if not getattr(client, 'logged_in', False):
+        login(recorder, client, rng.choice(fixtures.staff))
+        client.logged_in = True
+    loan_ids = [loan_id for loan_id in (fixtures.next_pending_loan('approval_batch') for _ in range(BATCH_SIZE))
+                if loan_id is not None]
+    if not loan_ids:
+        recorder.call(client, 'DashboardResource', 'GET', '/api/dashboard')
+        return
+    decisions = [{'loan_id': loan_id, 'status': 'approved' if rng.random() < 0.8 else 'rejected'} for loan_id in loan_ids]
+    recorder.call(client, 'LoanBatchManagement', 'PUT', '/api/loans/manage', json={'decisions': decisions})
+
+
+def customer_mix(recorder, client, fixtures, rng):
+    login_customer(recorder, client, fixtures, rng)
+    roll = rng.random()
+    if roll < 0.3:
+        recorder.call(client, 'DashboardResource', 'GET', '/api/dashboard')
+    elif roll < 0.55:
+        recorder.call(client, 'Savings.get', 'GET', '/api/savings')
+    elif roll < 0.7:
+        recorder.call(client, 'Savings.post', 'POST', '/api/savings',
+                      json={'action': 'deposit', 'amount': round(rng.uniform(1, 200), 2)})
+    elif roll < 0.85 or not client.loan_ids:
+        response = recorder.call(client, 'LoanApply', 'POST', '/api/loan/apply',
+                                 json={'amount': round(rng.uniform(500, 20000), 2), 'loan_duration': rng.choice([6, 12, 24])})
+        if response.status_code == 202:
+            client.loan_ids.append(response.get_json()['loan_id'])
+    else:
+        recorder.call(client, 'LoanStatus', 'GET', f'/api/loan/{rng.choice(client.loan_ids)}')
+
+
+SCENARIOS = {
+    'login_storm': login_storm,
+    'savings_burst': savings_burst,
+    'approval_queue': approval_queue,
+    'approval_batch': approval_batch,
+    'customer_mix': customer_mix,
+}
+
+
+def run_scenario(app, fixtures, name, requests, concurrency, seed):
+    recorder = Recorder()
+    step = SCENARIOS[name]
+    per_worker = max(1, requests // concurrency)
+
+    def worker(index):
+        rng = random.Random(seed * 1000 + index)
+        client = app.test_client()
+        for _ in range(per_worker):
+            step(recorder, client, fixtures, rng)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, range(concurrency)))
+    wall_time = time.perf_counter() - started
+
+    return {
+        'wall_time_s': round(wall_time, 3),
+        'requests': sum(len(stats.latencies) for stats in recorder.endpoints.values()),
+        'endpoints': {endpoint: stats.summary(wall_time) for endpoint, stats in sorted(recorder.endpoints.items())},
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report, baseline):
+    print(f"{'scenario/endpoint':40} {'p95 ms':>10} {'base':>10} {'delta':>8} {'queries':>8} {'base':>6}")
+    for scenario, result in report['scenarios'].items():
+        base_endpoints = baseline.get('scenarios', {}).get(scenario, {}).get('endpoints', {})
+        for endpoint, stats in result['endpoints'].items():
+            base = base_endpoints.get(endpoint)
+            p95 = stats['latency_ms']['p95']
+            queries = stats['queries']['mean']
+            if base is None:
+                print(f'{scenario + "/" + endpoint:40} {p95:>10.2f} {"-":>10} {"-":>8} {queries:>8.2f} {"-":>6}')
+                continue
+            base_p95 = base['latency_ms']['p95']
+            delta = (p95 - base_p95) / base_p95 * 100 if base_p95 else 0.0
+            print(f'{scenario + "/" + endpoint:40} {p95:>10.2f} {base_p95:>10.2f} {delta:>+7.1f}% '
+                  f'{queries:>8.2f} {base["queries"]["mean"]:>6.2f}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load test the API with concurrent mixed workloads.')
+    parser.add_argument('--db', default=os.path.join(tempfile.gettempdir(), 'malibora_loadtest.db'))
+    parser.add_argument('--users', type=int, default=20000, help='size of the seeded dataset')
+    parser.add_argument('--skip-seed', action='store_true', help='reuse the existing load test database')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+    parser.add_argument('--requests', type=int, default=1000, help='requests per scenario')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default='loadtest_report.json')
+    parser.add_argument('--compare', help='baseline report to compare against')
+    args = parser.parse_args(argv)
+
+    from sqlalchemy import event
+    from app import create_app
+    from models import db, User, Loan
+    import generate_data
+
+    # Every simulated client shares one address; measure the app, not the limiter
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{os.path.abspath(args.db)}',
+        'RATE_LIMIT_ENABLED': False,
+    })
+
+    if not args.skip_seed:
+        generate_data.generate(generate_data.build_parser().parse_args([
+            '--users', str(args.users), '--drop', '--quiet', '--seed', str(args.seed), '--password', PASSWORD,
+        ]), app)
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'users': args.users,
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'seed': args.seed,
+        },
+        'scenarios': {},
+    }
+
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', count_queries)
+        fixtures = Fixtures(db, User, Loan)
+        db.session.remove()
+
+    for name in args.scenarios.split(','):
+        if name in LOAN_POOLS:
+            with app.app_context():
+                fixtures.seed_pending_loans(name, args.requests * LOAN_POOLS[name], random.Random(args.seed))
+                db.session.remove()
+        print(f'Running {name} ...', file=sys.stderr)
+        report['scenarios'][name] = run_scenario(app, fixtures, name, args.requests, args.concurrency, args.seed)
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f'Report written to {args.output}', file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+    return report
+
+
+if __name__ == '__main__':
+    main()
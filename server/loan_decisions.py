@@ -0,0 +1,59 @@
+from sqlalchemy import select, update
+
+from models import db, Loan
+import portfolio
+from dashboard import dashboard_cache
+
+
+DECISIONS = ('approved', 'rejected')
+MAX_BATCH_SIZE = 1000
+
+
+def _transition(loan_ids, status):
+    # Only loans still pending move; RETURNING tells us which ones did
+    stmt = update(Loan).where(Loan.id.in_(loan_ids), Loan.status == 'pending') \
+        .values(status=status, version=Loan.version + 1) \
+        .execution_options(synchronize_session=False)
+
+    if db.engine.dialect.update_returning:
+        return db.session.execute(stmt.returning(Loan.id, Loan.amount, Loan.loan_duration, Loan.customer_id)).all()
+
+    # No RETURNING: read the pending rows first. The UPDATE keeps the same
+    # status guard, so a concurrent decision can only shrink the set.
+    rows = db.session.execute(
+        select(Loan.id, Loan.amount, Loan.loan_duration, Loan.customer_id)
+        .where(Loan.id.in_(loan_ids), Loan.status == 'pending')
+        .with_for_update()
+    ).all()
+    db.session.execute(stmt)
+    return rows
+
+
+def apply_decisions(decisions):
+    # decisions: {loan_id: 'approved' | 'rejected'}. One UPDATE per status,
+    # committed together; returns one result per decision, in order.
+    results = {}
+    customers = set()
+    for status in DECISIONS:
+        loan_ids = [loan_id for loan_id, decision in decisions.items() if decision == status]
+        if not loan_ids:
+            continue
+        rows = _transition(loan_ids, status)
+        portfolio.record_status_transition([(amount, duration) for _, amount, duration, _ in rows], 'pending', status)
+        for loan_id, _, _, customer_id in rows:
+            customers.add(customer_id)
+            results[loan_id] = {'loan_id': loan_id, 'result': status}
+
+    leftover = [loan_id for loan_id in decisions if loan_id not in results]
+    if leftover:
+        current = dict(db.session.execute(select(Loan.id, Loan.status).where(Loan.id.in_(leftover))).all())
+        for loan_id in leftover:
+            if loan_id in current:
+                results[loan_id] = {'loan_id': loan_id, 'result': 'skipped', 'reason': f'Loan is {current[loan_id]}'}
+            else:
+                results[loan_id] = {'loan_id': loan_id, 'result': 'skipped', 'reason': 'Loan not found'}
+
+    db.session.commit()
+    for customer_id in customers:
+        dashboard_cache.evict(customer_id)
+    return [results[loan_id] for loan_id in decisions]
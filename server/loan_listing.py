@@ -0,0 +1,75 @@
+import base64
+import json
+
+from sqlalchemy import tuple_
+
+from models import Loan
+
+
+# sort parameter -> (column, descending)
+SORTS = {
+    'id': (Loan.id, False),
+    '-id': (Loan.id, True),
+    'amount': (Loan.amount, False),
+    '-amount': (Loan.amount, True),
+}
+DEFAULT_SORT = '-id'
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(sort, value, loan_id):
+    raw = json.dumps([sort, value, loan_id], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor, sort):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        cursor_sort, value, loan_id = json.loads(raw)
+    except (ValueError, TypeError):
+        raise InvalidCursor('Malformed cursor')
+    if cursor_sort != sort or not isinstance(loan_id, int) or not isinstance(value, (int, float)):
+        raise InvalidCursor('Cursor does not match this query')
+    return value, loan_id
+
+
+def list_loans(status=None, customer_id=None, min_amount=None, max_amount=None,
+               sort=DEFAULT_SORT, limit=DEFAULT_LIMIT, cursor=None):
+    # Keyset pagination: each page seeks past the last (sort value, id) seen,
+    # so it is an index range scan no matter how deep the page is.
+    column, descending = SORTS[sort]
+
+    query = Loan.query
+    if status is not None:
+        query = query.filter(Loan.status == status)
+    if customer_id is not None:
+        query = query.filter(Loan.customer_id == customer_id)
+    if min_amount is not None:
+        query = query.filter(Loan.amount >= min_amount)
+    if max_amount is not None:
+        query = query.filter(Loan.amount <= max_amount)
+
+    if cursor:
+        value, last_id = decode_cursor(cursor, sort)
+        key = tuple_(column, Loan.id) if column is not Loan.id else Loan.id
+        bound = tuple_(value, last_id) if column is not Loan.id else last_id
+        query = query.filter(key < bound if descending else key > bound)
+
+    if column is Loan.id:
+        order = [Loan.id.desc() if descending else Loan.id.asc()]
+    else:
+        order = [column.desc(), Loan.id.desc()] if descending else [column.asc(), Loan.id.asc()]
+
+    loans = query.order_by(*order).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(loans) > limit:
+        loans = loans[:limit]
+        last = loans[-1]
+        next_cursor = encode_cursor(sort, getattr(last, column.key), last.id)
+    return loans, next_cursor
@@ -0,0 +1,50 @@
+from flask import current_app
+from sqlalchemy import func, select
+
+from models import db, Loan
+import portfolio
+from audit import audit_log
+from dashboard import dashboard_cache
+from jobs import handler, enqueue
+
+
+# Checks run off the request path on `flask jobs work`. Each returns None
+# to pass or a rejection reason; document checks and notifications slot in
+# here as further checks or jobs.
+def check_exposure(loan):
+    limit = current_app.config.get('LOAN_MAX_EXPOSURE')
+    if limit is None:
+        return None
+    outstanding = db.session.execute(
+        select(func.coalesce(func.sum(Loan.amount), 0.0))
+        .where(Loan.customer_id == loan.customer_id, Loan.id != loan.id,
+               Loan.status.in_(('submitted', 'pending', 'approved')))
+    ).scalar()
+    if outstanding + loan.amount > limit:
+        return f'Total exposure would exceed {limit}'
+    return None
+
+
+CHECKS = (check_exposure,)
+
+
+def submit(loan_id):
+    # Call in the transaction that inserts the loan, after a flush gives it an id
+    enqueue('loan.review', {'loan_id': loan_id})
+
+
+@handler('loan.review')
+def review_loan(payload):
+    loan = db.session.get(Loan, payload['loan_id'], with_for_update=True)
+    if loan is None or loan.status != 'submitted':
+        return  # already reviewed by an earlier delivery
+
+    reason = next((reason for reason in (check(loan) for check in CHECKS) if reason), None)
+    loan.status = 'rejected' if reason else 'pending'
+    portfolio.record_loan_change(loan, 'submitted')
+    loan_id, customer_id, status = loan.id, loan.customer_id, loan.status
+
+    def after_commit():
+        dashboard_cache.evict(customer_id)
+        audit_log.record(f'loan.{status}', 'loan', loan_id, old_status='submitted', reason=reason)
+    return after_commit
@@ -0,0 +1,278 @@
+from flask import Blueprint, request
+from flask_restful import Api, Resource
+from flask_login import current_user
+
+from sqlalchemy import select, update
+
+from models import db, Loan, to_minor, is_amount
+from access import login_required_resource, customer_required, staff_required
+from dashboard import DashboardResource, dashboard_cache
+from amortization import compute_schedule, METHODS as AMORTIZATION_METHODS
+import portfolio
+from settings_cache import loan_settings
+import ledger
+import loan_decisions
+import loan_listing
+import loan_pipeline
+from conditional import versioned_response, LOAN_STATUS
+from audit import audit_log
+
+
+bp = Blueprint('loans', __name__, url_prefix='/api')
+api = Api(bp)
+
+
+class LoanApply(Resource):
+    @customer_required
+    def post(self):
+        data = request.get_json()
+        
+        amount = data.get('amount')
+        loan_duration = data.get('loan_duration')
+        
+
+        if not all([amount,loan_duration]):
+            return {'error': 'Missing loan details'}, 400
+        
+        if not is_amount(amount) or type(loan_duration) is not int or amount <= 0 or loan_duration <= 0:
+            return {'error': 'Invalid loan details'}, 400
+        
+        # Get default interest rate from the cached settings
+        settings = loan_settings.get()
+        if not settings:
+            return {'error': 'Interest rate configuration missing. Contact admin.'}, 500
+        
+        interest_rate = settings['default_interest_rate']
+
+        # Create loan entry for customer; checks run later on the job workers
+        new_loan = Loan(
+            amount=amount,
+            interest_rate=interest_rate,
+            loan_duration=loan_duration,
+            status='submitted',
+            customer_id=current_user.id
+        )
+        db.session.add(new_loan)
+        db.session.flush()
+        loan_id = new_loan.id
+        loan_pipeline.submit(loan_id)
+        portfolio.record_loan_change(new_loan)
+        db.session.commit()
+        dashboard_cache.evict(current_user.id)
+
+        return {
+            'message': 'Loan application received',
+            'loan_id': loan_id,
+            'status': 'submitted',
+        }, 202, {'Location': f'/api/loan/{loan_id}'}
+
+
+class LoanStatus(Resource):
+    @login_required_resource
+    def get(self, loan_id):
+        # Polled by the mobile app; supports If-None-Match (see conditional.py)
+        response = versioned_response(LOAN_STATUS, f'loan-{loan_id}', Loan.id == loan_id, Loan.customer_id == current_user.id)
+        if response is None:
+            return {'error': 'Loan not found or you do not have access to this loan'}, 404
+        return response
+
+
+class LoanList(Resource):
+    # GET ?status=&customer_id=&min_amount=&max_amount=&sort=-id&limit=50&cursor=
+    @login_required_resource
+    def get(self):
+        args = request.args
+        sort = args.get('sort', loan_listing.DEFAULT_SORT)
+        status = args.get('status')
+
+        if sort not in loan_listing.SORTS:
+            return {'error': f'Invalid sort, expected one of {", ".join(loan_listing.SORTS)}'}, 400
+        if status is not None and status not in portfolio.LOAN_STATUSES:
+            return {'error': 'Invalid status'}, 400
+
+        try:
+            limit = int(args.get('limit', loan_listing.DEFAULT_LIMIT))
+            customer_id = int(args['customer_id']) if 'customer_id' in args else None
+            min_amount = float(args['min_amount']) if 'min_amount' in args else None
+            max_amount = float(args['max_amount']) if 'max_amount' in args else None
+        except ValueError:
+            return {'error': 'Invalid filter value'}, 400
+        if not 1 <= limit <= loan_listing.MAX_LIMIT:
+            return {'error': f'limit must be between 1 and {loan_listing.MAX_LIMIT}'}, 400
+
+        # Customers only ever see their own loans
+        if current_user.role == 'customer':
+            customer_id = current_user.id
+
+        try:
+            loans, next_cursor = loan_listing.list_loans(
+                status=status, customer_id=customer_id, min_amount=min_amount, max_amount=max_amount,
+                sort=sort, limit=limit, cursor=args.get('cursor'),
+            )
+        except loan_listing.InvalidCursor as exc:
+            return {'error': str(exc)}, 400
+
+        return {
+            'loans': [
+                {
+                    'loan_id': loan.id,
+                    'customer_id': loan.customer_id,
+                    'amount': loan.amount,
+                    'status': loan.status,
+                    'interest_rate': loan.interest_rate,
+                    'loan_duration': loan.loan_duration,
+                }
+                for loan in loans
+            ],
+            'next_cursor': next_cursor,
+        }, 200
+
+
+class LoanSchedule(Resource):
+    @login_required_resource
+    def get(self, loan_id):
+        method = request.args.get('method', 'annuity')  # 'annuity' or 'flat'
+        if method not in AMORTIZATION_METHODS:
+            return {'error': 'Invalid amortization method'}, 400
+
+        query = Loan.query.filter_by(id=loan_id)
+        if current_user.role == 'customer':
+            query = query.filter_by(customer_id=current_user.id)
+        loan = query.first_or_404()
+
+        schedule = compute_schedule(loan.amount, loan.interest_rate, loan.loan_duration, method=method)
+
+        return {
+            'loan_id': loan.id,
+            'method': method,
+            'accrued_interest': loan.accrued_interest,
+            'monthly_payment': round(float(schedule.payment[0, 0]), 2),
+            'total_interest': round(float(schedule.total_interest[0]), 2),
+            'total_payment': round(float(schedule.total_payment[0]), 2),
+            'schedule': schedule.rows(),
+        }, 200
+
+
+class LoanManagement(Resource):
+    # Only staff or admin can approve/reject loans
+    @staff_required
+    def put(self, loan_id):
+        data = request.get_json()
+        status = data.get('status')  # 'approved' or 'rejected'
+
+        if status not in ['approved', 'rejected']:
+            return {'error': 'Invalid status'}, 400
+
+        loan = Loan.query.get_or_404(loan_id)
+
+        # Only reviewed (pending) loans can be decided; the same guarded
+        # transition as the batch endpoint, so concurrent decisions can't both win
+        result, = loan_decisions.apply_decisions({loan_id: status})
+        if result['result'] == 'skipped':
+            return {'error': f'Loan is {loan.status}; only pending loans can be approved or rejected'}, 409
+        audit_log.record(f'loan.{status}', 'loan', loan_id, old_status='pending')
+
+        return {'message': f'Loan {status} successfully'}, 200
+
+
+class LoanBatchManagement(Resource):
+    # Body: {"decisions": [{"loan_id": 1, "status": "approved"}, ...]}
+    @staff_required
+    def put(self):
+        data = request.get_json()
+        decisions = data.get('decisions')
+
+        if not isinstance(decisions, list) or not decisions:
+            return {'error': 'Missing decisions'}, 400
+        if len(decisions) > loan_decisions.MAX_BATCH_SIZE:
+            return {'error': f'At most {loan_decisions.MAX_BATCH_SIZE} decisions per request'}, 400
+
+        by_loan = {}
+        for decision in decisions:
+            loan_id = decision.get('loan_id') if isinstance(decision, dict) else None
+            status = decision.get('status') if isinstance(decision, dict) else None
+            if type(loan_id) is not int or status not in loan_decisions.DECISIONS:  # bool is an int subclass
+                return {'error': 'Invalid decision', 'decision': decision}, 400
+            if loan_id in by_loan:
+                return {'error': f'Duplicate decision for loan {loan_id}'}, 400
+            by_loan[loan_id] = status
+
+        results = loan_decisions.apply_decisions(by_loan)
+
+        summary = {'approved': 0, 'rejected': 0, 'skipped': 0}
+        for result in results:
+            summary[result['result']] += 1
+            if result['result'] != 'skipped':
+                audit_log.record(f"loan.{result['result']}", 'loan', result['loan_id'], old_status='pending', batch=True)
+        return {'results': results, **summary}, 200
+
+
+class LoanRepayment(Resource):
+    @customer_required
+    def post(self, loan_id):
+        data = request.get_json()
+        amount = data.get('amount')
+
+        if not is_amount(amount) or amount <= 0:
+            return {'error': 'Invalid repayment amount'}, 400
+
+        # The guarded UPDATE takes the loan's row lock (SQLite: the write
+        # lock) before anything is read, so concurrent repayments queue up
+        # here and each one sees the amount the previous one left
+        locked = db.session.execute(
+            update(Loan)
+            .where(Loan.id == loan_id, Loan.customer_id == current_user.id, Loan.status == 'approved')
+            .values(version=Loan.version + 1)
+            .returning(Loan.amount, Loan.accrued_interest, Loan.loan_duration)
+            .execution_options(synchronize_session=False)
+        ).first()
+        if locked is None:
+            db.session.rollback()
+            owned = db.session.execute(
+                select(Loan.id).where(Loan.id == loan_id, Loan.customer_id == current_user.id)
+            ).first()
+            if owned is None:
+                return {'error': 'Loan not found'}, 404
+            return {'error': 'Loan is not in a repayable state'}, 409
+
+        try:
+            ledger.post_entry(current_user.savings_account_id, -to_minor(amount), 'loan_repayment', reference=f'loan:{loan_id}')
+        except ledger.InsufficientFunds:
+            db.session.rollback()
+            return {'error': 'Insufficient savings to repay loan'}, 400
+
+        # Interest accrued by the nightly job is settled before principal
+        old_amount = locked.amount
+        interest_paid = round(min(amount, locked.accrued_interest), 2)
+        accrued_interest = round(locked.accrued_interest - interest_paid, 2)
+        remaining = max(old_amount - (amount - interest_paid), 0.0)
+        status = 'repaid' if remaining <= 0 else 'approved'
+        db.session.execute(
+            update(Loan).where(Loan.id == loan_id)
+            .values(amount=remaining, accrued_interest=accrued_interest, status=status)
+            .execution_options(synchronize_session=False)
+        )
+
+        portfolio.record_repayment(locked.loan_duration, old_amount, remaining, status)
+        portfolio.record_deposit_change(-amount)
+        db.session.commit()
+        dashboard_cache.evict(current_user.id)
+        audit_log.record('loan.repayment', 'loan', loan_id, amount=amount, interest_paid=interest_paid,
+                         old_status='approved', status=status, remaining=remaining)
+
+        return {
+            'message': 'Loan repayment successful',
+            'interest_paid': interest_paid,
+            'remaining_loan_amount': remaining,
+            'accrued_interest': accrued_interest,
+        }, 200
+
+
+api.add_resource(DashboardResource, '/dashboard')
+api.add_resource(LoanApply, '/loan/apply')  # Loan application route
+api.add_resource(LoanList, '/loans')  # Keyset-paginated listing
+api.add_resource(LoanStatus, '/loan/<int:loan_id>')  # View loan status
+api.add_resource(LoanSchedule, '/loan/<int:loan_id>/schedule')  # Amortization schedule
+api.add_resource(LoanManagement, '/loan/<int:loan_id>/manage')  # Staff/Admin loan approval
+api.add_resource(LoanBatchManagement, '/loans/manage')  # Staff/Admin batch approval
+api.add_resource(LoanRepayment, '/loan/<int:loan_id>/repay')  # POST
@@ -0,0 +1,166 @@
+import threading
+import time
+from bisect import bisect_left
+
+from flask import Response, current_app, request
+from sqlalchemy import event
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+PREFIX = 'malibora'
+
+
+class _Series:
+    # Fixed-size counters for one (endpoint, method); recording a sample
+    # only bumps existing slots.
+    __slots__ = ('latency_counts', 'latency_sum', 'query_counts', 'query_sum', 'db_time_sum', 'statuses')
+
+    def __init__(self):
+        self.latency_counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.latency_sum = 0.0
+        self.query_counts = [0] * (len(QUERY_BUCKETS) + 1)
+        self.query_sum = 0
+        self.db_time_sum = 0.0
+        self.statuses = {}
+
+
+class Registry:
+    # Each thread writes only to its own shard, so the hot path takes no
+    # lock; a scrape sums the shards. Shards outlive their threads so
+    # counters stay monotonic.
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = []
+        self._shards_lock = threading.Lock()
+
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._shards_lock:
+                self._shards.append(shard)
+        return shard
+
+    def observe(self, endpoint, method, status, latency, queries, db_time):
+        key = (endpoint, method)
+        shard = self._shard()
+        series = shard.get(key)
+        if series is None:
+            series = shard[key] = _Series()
+        series.latency_counts[bisect_left(LATENCY_BUCKETS, latency)] += 1
+        series.latency_sum += latency
+        series.query_counts[bisect_left(QUERY_BUCKETS, queries)] += 1
+        series.query_sum += queries
+        series.db_time_sum += db_time
+        series.statuses[status] = series.statuses.get(status, 0) + 1
+
+    def collect(self):
+        with self._shards_lock:
+            shards = list(self._shards)
+        totals = {}
+        for shard in shards:
+            for key, series in list(shard.items()):
+                total = totals.get(key)
+                if total is None:
+                    total = totals[key] = _Series()
+                total.latency_counts = [a + b for a, b in zip(total.latency_counts, series.latency_counts)]
+                total.latency_sum += series.latency_sum
+                total.query_counts = [a + b for a, b in zip(total.query_counts, series.query_counts)]
+                total.query_sum += series.query_sum
+                total.db_time_sum += series.db_time_sum
+                for status, count in list(series.statuses.items()):
+                    total.statuses[status] = total.statuses.get(status, 0) + count
+        return totals
+
+
+_request = threading.local()
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{name}="{value}"' for name, value in labels.items()) + '}'
+
+
+def _histogram(lines, name, help_text, buckets, series_by_key, counts_attr, sum_attr):
+    lines.append(f'# HELP {name} {help_text}')
+    lines.append(f'# TYPE {name} histogram')
+    for (endpoint, method), series in sorted(series_by_key.items()):
+        counts = getattr(series, counts_attr)
+        cumulative = 0
+        for bound, count in zip(buckets, counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{_labels(endpoint=endpoint, method=method, le=bound)} {cumulative}')
+        cumulative += counts[-1]
+        lines.append(f'{name}_bucket{_labels(endpoint=endpoint, method=method, le="+Inf")} {cumulative}')
+        lines.append(f'{name}_sum{_labels(endpoint=endpoint, method=method)} {getattr(series, sum_attr)}')
+        lines.append(f'{name}_count{_labels(endpoint=endpoint, method=method)} {cumulative}')
+
+
+def render(registry):
+    totals = registry.collect()
+    lines = []
+    _histogram(lines, f'{PREFIX}_http_request_duration_seconds', 'Request latency by endpoint.',
+               LATENCY_BUCKETS, totals, 'latency_counts', 'latency_sum')
+    _histogram(lines, f'{PREFIX}_db_queries_per_request', 'SQL statements issued per request.',
+               QUERY_BUCKETS, totals, 'query_counts', 'query_sum')
+
+    name = f'{PREFIX}_db_time_seconds_total'
+    lines.append(f'# HELP {name} Time spent executing SQL, by endpoint.')
+    lines.append(f'# TYPE {name} counter')
+    for (endpoint, method), series in sorted(totals.items()):
+        lines.append(f'{name}{_labels(endpoint=endpoint, method=method)} {series.db_time_sum}')
+
+    name = f'{PREFIX}_http_requests_total'
+    lines.append(f'# HELP {name} Requests by endpoint and status code.')
+    lines.append(f'# TYPE {name} counter')
+    for (endpoint, method), series in sorted(totals.items()):
+        for status, count in sorted(series.statuses.items()):
+            lines.append(f'{name}{_labels(endpoint=endpoint, method=method, status=status)} {count}')
+    return '\n'.join(lines) + '\n'
+
+
+def _before_request():
+    _request.active = True
+    _request.queries = 0
+    _request.db_time = 0.0
+    _request.started = time.perf_counter()
+
+
+def _after_request(response):
+    if getattr(_request, 'active', False):
+        _request.active = False
+        current_app.extensions['metrics'].observe(
+            request.endpoint or 'unmatched', request.method, response.status_code,
+            time.perf_counter() - _request.started, _request.queries, _request.db_time,
+        )
+    return response
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    _request.query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if getattr(_request, 'active', False):
+        _request.queries += 1
+        _request.db_time += time.perf_counter() - _request.query_started
+
+
+def init_app(app, engine):
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+
+    app.extensions['metrics'] = registry = Registry()
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+    token = app.config.get('METRICS_TOKEN')
+
+    @app.route('/metrics')
+    def metrics_endpoint():
+        if token and request.headers.get('Authorization') != f'Bearer {token}':
+            return Response('Forbidden\n', status=403, mimetype='text/plain')
+        return Response(render(registry), mimetype='text/plain; version=0.0.4')
@@ -3,7 +3,12 @@ from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import UserMixin
 
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import MetaData
+from sqlalchemy import MetaData, event
+from sqlalchemy.ext.hybrid import hybrid_property
+
+import math
+from datetime import datetime
+from decimal import Decimal, ROUND_HALF_UP
 
 
 convention = {
@@ -19,6 +24,20 @@ metadata = MetaData(naming_convention=convention)
 db = SQLAlchemy(metadata=metadata)
 
 
+def to_minor(amount):
+    # Money is stored as integer minor units (cents) to avoid float drift
+    return int((Decimal(str(amount)) * 100).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+
+
+def from_minor(amount_minor):
+    return amount_minor / 100
+
+
+def is_amount(value):
+    # A JSON number that to_minor can take: not a bool, NaN or Infinity
+    return type(value) in (int, float) and math.isfinite(value)
+
+
 
 
 
@@ -41,18 +60,18 @@ class User(UserMixin, db.Model):
 class Customer(db.Model):
     __tablename__ = 'customers'
     id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
     account_number = db.Column(db.String(20))
     address = db.Column(db.String(200))
     national_id = db.Column(db.String(30))
 
     
     
-    savings_account = db.relationship('SavingsAccount', uselist=False, back_populates='customer')
-    loans = db.relationship('Loan', backref='customer', lazy=True)
+    savings_account = db.relationship('SavingsAccount', uselist=False, back_populates='customer', cascade='all, delete-orphan')
+    # Loan.customer_id references users.id, which is also the customer's primary key
+    loans = db.relationship('Loan', primaryjoin='Customer.id == foreign(Loan.customer_id)', viewonly=True, lazy=True)
 
 
-    user = db.relationship('User', backref=db.backref('customer', uselist=False))
+    user = db.relationship('User', backref=db.backref('customer', uselist=False, cascade='all, delete-orphan'))
 
 
 class Staff(db.Model):
@@ -61,7 +80,7 @@ class Staff(db.Model):
     employee_id = db.Column(db.String(30))
     department = db.Column(db.String(50))
 
-    user = db.relationship('User', backref=db.backref('staff', uselist=False))
+    user = db.relationship('User', backref=db.backref('staff', uselist=False, cascade='all, delete-orphan'))
 
 
 class Admin(db.Model):
@@ -70,17 +89,27 @@ class Admin(db.Model):
     access_level = db.Column(db.String(30))
     is_superuser = db.Column(db.Boolean, default=False)
 
-    user = db.relationship('User', backref=db.backref('admin', uselist=False))
+    user = db.relationship('User', backref=db.backref('admin', uselist=False, cascade='all, delete-orphan'))
 
 class Loan(db.Model):
     __tablename__ = 'loans'
+    # Keyset pagination indexes for loan_listing.py; (filter..., sort key, id)
+    __table_args__ = (
+        db.Index('ix_loans_status_id', 'status', 'id'),
+        db.Index('ix_loans_status_amount_id', 'status', 'amount', 'id'),
+        db.Index('ix_loans_amount_id', 'amount', 'id'),  # amount sorts without a status filter
+        db.Index('ix_loans_customer_id_id', 'customer_id', 'id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     amount = db.Column(db.Float, nullable=False)
-    status = db.Column(db.String(20), default='pending')  # 'pending', 'approved', 'rejected'
+    status = db.Column(db.String(20), default='pending')  # 'submitted' (awaiting checks), 'pending', 'approved', 'rejected', 'repaid'
     interest_rate = db.Column(db.Float, nullable=False)
     loan_duration = db.Column(db.Integer, nullable=False)  # Duration in months
     customer_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    accrued_interest = db.Column(db.Float, default=0.0, server_default='0', nullable=False)
+    accrued_through = db.Column(db.Date)  # last day interest was accrued for; see accrual.py
+    version = db.Column(db.Integer, default=1, server_default='1', nullable=False)  # bumped on every change; ETags
     customer = db.relationship('User', backref=db.backref('loans', lazy=True))
 
     def approve_loan(self):
@@ -96,7 +125,120 @@ class LoanSettings(db.Model):
 
 class SavingsAccount(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    balance = db.Column(db.Float, default=0.0, nullable=False)
-    customer_id = db.Column(db.Integer, db.ForeignKey('customer.id'), unique=True)
+    balance_minor = db.Column(db.BigInteger, default=0, nullable=False)
+    customer_id = db.Column(db.Integer, db.ForeignKey('customers.id'), unique=True)
+    version = db.Column(db.Integer, default=1, server_default='1', nullable=False)  # bumped on every change; ETags
     
     customer = db.relationship('Customer', back_populates='savings_account')
+
+    # Changes go through ledger.post_entry, never by assigning to balance
+    @hybrid_property
+    def balance(self):
+        return from_minor(self.balance_minor or 0)
+
+    @balance.setter
+    def balance(self, value):
+        self.balance_minor = to_minor(value)
+
+    @balance.expression
+    def balance(cls):
+        return cls.balance_minor / 100.0
+
+
+@event.listens_for(Loan, 'before_update')
+@event.listens_for(SavingsAccount, 'before_update')
+def _bump_version(mapper, connection, target):
+    # ORM flushes; bulk UPDATEs elsewhere bump version themselves
+    target.version = mapper.class_.version + 1
+
+
+class SavingsTransaction(db.Model):
+    # Append-only ledger; amount_minor is signed (credits positive)
+    __tablename__ = 'savings_transactions'
+    __table_args__ = (
+        db.Index('ix_savings_transactions_account_id_id', 'account_id', 'id'),
+        db.Index('ix_savings_transactions_account_id_created_at', 'account_id', 'created_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    account_id = db.Column(db.Integer, db.ForeignKey('savings_account.id'), nullable=False)
+    kind = db.Column(db.String(20), nullable=False)  # 'opening_balance', 'deposit', 'withdrawal', 'loan_repayment'
+    amount_minor = db.Column(db.BigInteger, nullable=False)
+    reference = db.Column(db.String(50))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+
+@event.listens_for(SavingsTransaction, 'before_update')
+@event.listens_for(SavingsTransaction, 'before_delete')
+def _ledger_is_append_only(mapper, connection, target):
+    raise ValueError('Savings ledger entries cannot be modified or deleted')
+
+
+class SavingsSnapshot(db.Model):
+    # Balance after every ledger entry up to and including transaction_id
+    __tablename__ = 'savings_snapshots'
+    __table_args__ = (db.Index('ix_savings_snapshots_account_id_id', 'account_id', 'id'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    account_id = db.Column(db.Integer, db.ForeignKey('savings_account.id'), nullable=False)
+    transaction_id = db.Column(db.Integer, nullable=False)
+    balance_minor = db.Column(db.BigInteger, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+
+class PortfolioSummary(db.Model):
+    # Running aggregates maintained by portfolio.py; rebuilt from scratch by `flask portfolio rebuild`
+    __tablename__ = 'portfolio_summary'
+    __table_args__ = (db.UniqueConstraint('metric', 'bucket'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    metric = db.Column(db.String(40), nullable=False)  # 'loans_by_status', 'exposure_by_duration', 'deposits'
+    bucket = db.Column(db.String(40), nullable=False)
+    count = db.Column(db.Integer, default=0, nullable=False)
+    amount = db.Column(db.Float, default=0.0, nullable=False)
+
+
+class AccrualRun(db.Model):
+    # Checkpoint for `flask accrual run`: loans up to last_loan_id are done for run_date
+    __tablename__ = 'accrual_runs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    run_date = db.Column(db.Date, unique=True, nullable=False)
+    last_loan_id = db.Column(db.Integer, default=0, nullable=False)
+    loans_accrued = db.Column(db.Integer, default=0, nullable=False)
+    interest_accrued = db.Column(db.Float, default=0.0, nullable=False)
+    started_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    completed_at = db.Column(db.DateTime)
+
+
+class AuditEvent(db.Model):
+    # Written in batches by audit.py, never in the request's own transaction
+    __tablename__ = 'audit_events'
+    __table_args__ = (db.Index('ix_audit_events_entity_entity_id', 'entity', 'entity_id'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    created_at = db.Column(db.DateTime, nullable=False, index=True)
+    actor_id = db.Column(db.Integer)  # user who made the change; None for system jobs
+    action = db.Column(db.String(40), nullable=False)  # 'savings.deposit', 'loan.approved', ...
+    entity = db.Column(db.String(40), nullable=False)
+    entity_id = db.Column(db.Integer)
+    data = db.Column(db.JSON)
+
+
+class Job(db.Model):
+    # Deferred work for jobs.py; claimed by `flask jobs work` processes
+    __tablename__ = 'jobs'
+    __table_args__ = (db.Index('ix_jobs_status_run_at_id', 'status', 'run_at', 'id'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)  # handler name, e.g. 'loan.review'
+    payload = db.Column(db.JSON, nullable=False)
+    status = db.Column(db.String(20), default='queued', nullable=False)  # 'queued', 'running', 'done', 'failed'
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    max_attempts = db.Column(db.Integer, default=5, nullable=False)
+    run_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    locked_by = db.Column(db.String(64))
+    locked_at = db.Column(db.DateTime)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    finished_at = db.Column(db.DateTime)
@@ -0,0 +1,163 @@
+import importlib
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import case, delete, func, update
+from sqlalchemy.exc import IntegrityError
+
+from models import db, Loan, SavingsAccount, PortfolioSummary
+
+
+LOAN_STATUSES = ['submitted', 'pending', 'approved', 'rejected', 'repaid']
+
+# (label, upper bound in months); the last bucket is open-ended
+DURATION_BUCKETS = [('0-6', 6), ('7-12', 12), ('13-24', 24), ('25-36', 36), ('37+', None)]
+
+
+def duration_bucket(months):
+    for label, upper in DURATION_BUCKETS:
+        if upper is None or months <= upper:
+            return label
+
+
+# Dialects with INSERT ... ON CONFLICT. Their modules load on first use: the
+# PostgreSQL one alone costs ~50 ms of worker start-up on SQLite deployments.
+UPSERT_DIALECTS = ('sqlite', 'postgresql')
+
+
+def _bump(metric, bucket, count=0, amount=0.0):
+    # One atomic upsert, so two first writers to a new bucket can't both
+    # try to insert it and fail the second user's request
+    if not count and not amount:
+        return
+    dialect = db.engine.dialect.name
+    if dialect in UPSERT_DIALECTS:
+        insert = importlib.import_module(f'sqlalchemy.dialects.{dialect}').insert
+        stmt = insert(PortfolioSummary).values(metric=metric, bucket=bucket, count=count, amount=amount)
+        db.session.execute(stmt.on_conflict_do_update(
+            index_elements=[PortfolioSummary.metric, PortfolioSummary.bucket],
+            set_={'count': PortfolioSummary.count + stmt.excluded.count,
+                  'amount': PortfolioSummary.amount + stmt.excluded.amount},
+        ))
+        return
+
+    # Other databases: insert in a savepoint, and update if someone beat us to it
+    increment = update(PortfolioSummary) \
+        .where(PortfolioSummary.metric == metric, PortfolioSummary.bucket == bucket) \
+        .values(count=PortfolioSummary.count + count, amount=PortfolioSummary.amount + amount)
+    if db.session.execute(increment).rowcount:
+        return
+    try:
+        with db.session.begin_nested():
+            db.session.add(PortfolioSummary(metric=metric, bucket=bucket, count=count, amount=amount))
+    except IntegrityError:
+        db.session.execute(increment)
+
+
+def _loan_contribution(status, amount, duration, sign):
+    _bump('loans_by_status', status, sign, sign * amount)
+    # Exposure only counts money that is actually out with customers
+    if status == 'approved':
+        _bump('exposure_by_duration', duration_bucket(duration), sign, sign * amount)
+
+
+def record_loan_change(loan, old_status=None, old_amount=None):
+    # Call inside the transaction that changes the loan. old_status=None
+    # means the loan is new; otherwise its previous contribution is reversed.
+    if old_status is not None:
+        _loan_contribution(old_status, old_amount if old_amount is not None else loan.amount, loan.loan_duration, -1)
+    _loan_contribution(loan.status or 'pending', loan.amount, loan.loan_duration, 1)
+
+
+def record_repayment(duration, old_amount, amount, status):
+    # Repayments update the loan row with a guarded UPDATE, not through the ORM
+    _loan_contribution('approved', old_amount, duration, -1)
+    _loan_contribution(status, amount, duration, 1)
+
+
+def record_new_loans(loans, status='pending'):
+    # Bulk form of record_loan_change for freshly inserted loans
+    if not loans:
+        return
+    _bump('loans_by_status', status, len(loans), sum(amount for amount, _ in loans))
+
+
+def record_status_transition(loans, old_status, new_status):
+    # Bulk form of record_loan_change for set-based updates; loans is a list
+    # of (amount, duration). Issues one UPDATE per affected bucket.
+    if not loans:
+        return
+    total = sum(amount for amount, _ in loans)
+    _bump('loans_by_status', old_status, -len(loans), -total)
+    _bump('loans_by_status', new_status, len(loans), total)
+
+    buckets = {}
+    for amount, duration in loans:
+        count, subtotal = buckets.get(duration_bucket(duration), (0, 0.0))
+        buckets[duration_bucket(duration)] = (count + 1, subtotal + amount)
+    sign = 1 if new_status == 'approved' else -1 if old_status == 'approved' else 0
+    if sign:
+        for label, (count, subtotal) in buckets.items():
+            _bump('exposure_by_duration', label, sign * count, sign * subtotal)
+
+
+def record_deposit_change(amount, accounts=0):
+    _bump('deposits', 'total', accounts, amount)
+
+
+def rebuild():
+    db.session.execute(delete(PortfolioSummary))
+
+    rows = {('loans_by_status', status): [0, 0.0] for status in LOAN_STATUSES}
+    rows.update({('exposure_by_duration', label): [0, 0.0] for label, _ in DURATION_BUCKETS})
+
+    status_totals = db.session.query(
+        func.coalesce(Loan.status, 'pending'), func.count(Loan.id), func.coalesce(func.sum(Loan.amount), 0.0)
+    ).group_by(func.coalesce(Loan.status, 'pending'))
+    for status, count, amount in status_totals:
+        rows[('loans_by_status', status)] = [count, amount]
+
+    bucket = case(
+        *[(Loan.loan_duration <= upper, label) for label, upper in DURATION_BUCKETS if upper is not None],
+        else_=DURATION_BUCKETS[-1][0],
+    )
+    exposure = db.session.query(bucket, func.count(Loan.id), func.coalesce(func.sum(Loan.amount), 0.0)) \
+        .filter(Loan.status == 'approved').group_by(bucket)
+    for label, count, amount in exposure:
+        rows[('exposure_by_duration', label)] = [count, amount]
+
+    accounts, balance = db.session.query(
+        func.count(SavingsAccount.id), func.coalesce(func.sum(SavingsAccount.balance_minor), 0) / 100.0
+    ).one()
+    rows[('deposits', 'total')] = [accounts, balance]
+
+    db.session.add_all(
+        PortfolioSummary(metric=metric, bucket=bucket, count=count, amount=amount)
+        for (metric, bucket), (count, amount) in rows.items()
+    )
+    db.session.commit()
+
+
+def summary():
+    metrics = {}
+    for row in PortfolioSummary.query.all():
+        metrics.setdefault(row.metric, {})[row.bucket] = {'count': row.count, 'amount': round(row.amount, 2)}
+
+    by_status = metrics.get('loans_by_status', {})
+    deposits = metrics.get('deposits', {}).get('total', {'count': 0, 'amount': 0.0})
+    return {
+        'outstanding_principal': by_status.get('approved', {'amount': 0.0})['amount'],
+        'loans_by_status': by_status,
+        'deposits': {'accounts': deposits['count'], 'total_balance': deposits['amount']},
+        'exposure_by_duration': metrics.get('exposure_by_duration', {}),
+    }
+
+
+portfolio_cli = AppGroup('portfolio', help='Portfolio summary maintenance.')
+
+
+@portfolio_cli.command('rebuild')
+def rebuild_command():
+    """Recompute the portfolio summary table from loans and savings."""
+    rebuild()
+    click.echo('Portfolio summary rebuilt.')
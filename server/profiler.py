@@ -0,0 +1,220 @@
+import hashlib
+import hmac
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from flask import g, request, current_app
+from flask_login import current_user
+from sqlalchemy import event
+from werkzeug.local import LocalProxy
+
+
+class Profile:
+    def __init__(self, thread_id, endpoint, reason):
+        self.thread_id = thread_id
+        self.endpoint = endpoint
+        self.reason = reason
+        self.started = time.perf_counter()
+        self.samples = Counter()
+        self.statements = []   # (seconds, statement)
+        self.current_sql = None
+        self._sql_started = None
+
+
+def _frame_name(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(';', ':')
+
+
+def _collapse(frame, sql):
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame.f_code))
+        frame = frame.f_back
+    names.reverse()
+    if sql is not None:
+        # Time spent waiting on the database shows up as its own frame
+        names.append('SQL: ' + ' '.join(sql.split())[:120].replace(';', ':'))
+    return ';'.join(names)
+
+
+class SamplingProfiler:
+    # Opt-in per request: an admin's X-Profile header, a ?_profile= flag
+    # signed by an admin for one path, or PROFILE_SAMPLE_RATE of traffic.
+    # One sampler thread snapshots the stacks of the profiled request
+    # threads every PROFILE_INTERVAL seconds and sleeps when none are
+    # active, so unprofiled requests pay only for the checks in before_request.
+    def __init__(self, interval=0.005, sample_rate=0.0, max_concurrent=2, max_files=200, max_bytes=50 * 1024 * 1024):
+        self.interval = interval
+        self.sample_rate = sample_rate
+        self.max_concurrent = max_concurrent
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self.directory = None
+        self._key = None
+        self._active = {}  # thread id -> Profile
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._sampler = None
+        self._pid = None
+
+    def init_app(self, app, engine):
+        self.interval = app.config.get('PROFILE_INTERVAL', self.interval)
+        self.sample_rate = app.config.get('PROFILE_SAMPLE_RATE', self.sample_rate)
+        self.max_concurrent = app.config.get('PROFILE_MAX_CONCURRENT', self.max_concurrent)
+        self.max_files = app.config.get('PROFILE_MAX_FILES', self.max_files)
+        self.max_bytes = app.config.get('PROFILE_MAX_BYTES', self.max_bytes)
+        self.directory = app.config.get('PROFILE_DIR', os.path.join(app.instance_path, 'profiles'))
+        self._key = hmac.new(app.config['SECRET_KEY'].encode(), b'malibora.profile', hashlib.sha256).digest()
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+        event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+
+    # Signed flags let an admin hand out a link that profiles one path
+    # for a while, e.g. to catch a slow request from a customer's device.
+
+    def _signature(self, path, expires):
+        return hmac.new(self._key, f'{path}:{expires}'.encode(), hashlib.sha256).hexdigest()[:32]
+
+    def sign(self, path, ttl):
+        expires = int(time.time()) + ttl
+        return f'{expires}.{self._signature(path, expires)}', expires
+
+    def verify(self, token, path):
+        expires, _, signature = token.partition('.')
+        if not expires.isdigit() or int(expires) < time.time():
+            return False
+        return hmac.compare_digest(signature, self._signature(path, int(expires)))
+
+    def _reason(self):
+        if request.headers.get('X-Profile') and current_user.is_authenticated and current_user.role == 'admin':
+            return 'header'
+        token = request.args.get('_profile')
+        if token and self.verify(token, request.path):
+            return 'signed'
+        if self.sample_rate and random.random() < self.sample_rate:
+            return 'sampled'
+        return None
+
+    def _before_request(self):
+        reason = self._reason()
+        if reason is None:
+            return
+        thread_id = threading.get_ident()
+        with self._lock:
+            if len(self._active) >= self.max_concurrent:
+                return
+            profile = self._active[thread_id] = Profile(thread_id, request.endpoint or 'unmatched', reason)
+        g.profile = profile
+        self._ensure_sampler()
+        self._wakeup.set()
+
+    def _finish(self):
+        profile = g.pop('profile', None)
+        if profile is None:
+            return None
+        with self._lock:
+            self._active.pop(profile.thread_id, None)
+        return self._write(profile)
+
+    def _after_request(self, response):
+        name = self._finish()
+        if name:
+            response.headers['X-Profile-Id'] = name
+        return response
+
+    def _teardown_request(self, exc):
+        # Requests that raised never reach after_request
+        self._finish()
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        profile = self._active.get(threading.get_ident())
+        if profile is not None:
+            profile.current_sql = statement
+            profile._sql_started = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        profile = self._active.get(threading.get_ident())
+        if profile is not None and profile._sql_started is not None:
+            profile.statements.append((time.perf_counter() - profile._sql_started, statement))
+            profile.current_sql = profile._sql_started = None
+
+    def _ensure_sampler(self):
+        # One per process, started on first use so forked workers get their own
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._sampler = threading.Thread(target=self._sample_loop, name='profiler', daemon=True)
+                    self._sampler.start()
+                    self._pid = os.getpid()
+
+    def _sample_loop(self):
+        while True:
+            if not self._active:
+                self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+            frames = sys._current_frames()
+            for thread_id, profile in list(self._active.items()):
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    profile.samples[_collapse(frame, profile.current_sql)] += 1
+            del frames
+            time.sleep(self.interval)
+
+    def _write(self, profile):
+        elapsed = time.perf_counter() - profile.started
+        os.makedirs(self.directory, exist_ok=True)
+        name = f"{datetime.utcnow():%Y%m%dT%H%M%S%f}-{profile.endpoint.replace('.', '_')}-{profile.reason}"
+
+        # Collapsed stacks, one "frame;frame;frame count" line each, for flamegraph.pl / speedscope
+        with open(os.path.join(self.directory, name + '.folded'), 'w') as f:
+            for stack, count in profile.samples.most_common():
+                f.write(f'{stack} {count}\n')
+        with open(os.path.join(self.directory, name + '.sql'), 'w') as f:
+            f.write(f'# {request.method} {request.full_path} {elapsed * 1000:.1f} ms, '
+                    f'{sum(profile.samples.values())} samples, {len(profile.statements)} statements\n')
+            for seconds, statement in profile.statements:
+                f.write(f"{seconds * 1000:.3f} ms  {' '.join(statement.split())}\n")
+        self._prune()
+        return name
+
+    def _prune(self):
+        # Names start with a timestamp, so the oldest profiles go first once
+        # either retention limit is exceeded
+        sizes = {}
+        for entry in os.scandir(self.directory):
+            name, extension = os.path.splitext(entry.name)
+            if extension in ('.folded', '.sql'):
+                sizes[name] = sizes.get(name, 0) + entry.stat().st_size
+        kept, kept_bytes = 0, 0
+        for name in sorted(sizes, reverse=True):
+            kept += 1
+            kept_bytes += sizes[name]
+            if kept > self.max_files or kept_bytes > self.max_bytes:
+                for extension in ('.folded', '.sql'):
+                    try:
+                        os.remove(os.path.join(self.directory, name + extension))
+                    except FileNotFoundError:
+                        pass
+
+    def recent(self):
+        if not self.directory or not os.path.isdir(self.directory):
+            return []
+        return sorted((entry.name[:-len('.folded')] for entry in os.scandir(self.directory)
+                       if entry.name.endswith('.folded')), reverse=True)
+
+
+def init_app(app, engine):
+    app.extensions['profiler'] = instance = SamplingProfiler()
+    instance.init_app(app, engine)
+
+
+profiler = LocalProxy(lambda: current_app.extensions['profiler'])
@@ -0,0 +1,94 @@
+import re
+import threading
+from collections import Counter
+from contextlib import ContextDecorator
+
+from flask import request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_PARAM_LISTS = re.compile(r'\(\s*(?:\?|%s|%\(\w+\)s|:\w+)(?:\s*,\s*(?:\?|%s|%\(\w+\)s|:\w+))*\s*\)')
+_SPACES = re.compile(r'\s+')
+
+
+def statement_shape(statement):
+    # Same shape = same SQL once literals and expanded IN lists are folded
+    shape = _LITERALS.sub('?', statement)
+    shape = _PARAM_LISTS.sub('(?)', shape)
+    return _SPACES.sub(' ', shape).strip()
+
+
+class QueryBudgetExceeded(AssertionError):
+    def __init__(self, limit, statements):
+        self.limit = limit
+        self.statements = statements
+        lines = '\n'.join(f'  {count}x {shape}' for shape, count in Counter(map(statement_shape, statements)).most_common())
+        super().__init__(f'{len(statements)} statements issued, budget was {limit}:\n{lines}')
+
+
+class query_budget(ContextDecorator):
+    # Fails the block if it runs more than `limit` statements on any engine:
+    #
+    #     with query_budget(2):
+    #         client.get('/api/savings')
+    #
+    #     @query_budget(3)
+    #     def test_dashboard(): ...
+    #
+    # Only statements from the entering thread count; the test client runs
+    # the request in the caller's thread.
+    def __init__(self, limit):
+        self.limit = limit
+        self.statements = []
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        if threading.get_ident() == self._thread:
+            self.statements.append(statement)
+
+    def __enter__(self):
+        self.statements = []
+        self._thread = threading.get_ident()
+        event.listen(Engine, 'before_cursor_execute', self._record)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        event.remove(Engine, 'before_cursor_execute', self._record)
+        if exc_type is None and len(self.statements) > self.limit:
+            raise QueryBudgetExceeded(self.limit, self.statements)
+        return False
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+
+_request = threading.local()
+
+
+def init_app(app, engine):
+    # Dev-mode N+1 warning: log any statement shape repeated at least
+    # QUERY_REPEAT_THRESHOLD times within one request. The flag is read per
+    # request, since app.run(debug=True) turns debug on after create_app.
+    @event.listens_for(engine, 'before_cursor_execute')
+    def record_shape(conn, cursor, statement, parameters, context, executemany):
+        shapes = getattr(_request, 'shapes', None)
+        if shapes is not None:
+            shapes[statement_shape(statement)] += 1
+
+    @app.before_request
+    def start_tracking():
+        if app.config.get('QUERY_REPEAT_WARNINGS', app.debug):
+            _request.shapes = Counter()
+
+    @app.after_request
+    def report_repeats(response):
+        shapes, _request.shapes = getattr(_request, 'shapes', None), None
+        if shapes:
+            threshold = app.config.get('QUERY_REPEAT_THRESHOLD', 3)
+            for shape, count in shapes.most_common():
+                if count < threshold:
+                    break
+                app.logger.warning('Possible N+1 in %s %s: %d x %s', request.method, request.path, count, shape)
+        return response
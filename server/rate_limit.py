@@ -0,0 +1,137 @@
+import math
+import os
+import sqlite3
+import threading
+import time
+
+from flask import current_app
+from werkzeug.local import LocalProxy
+
+from cache import LRUCache
+
+
+# name -> (burst capacity, seconds to refill it completely)
+DEFAULT_LIMITS = {
+    'login_ip': (20, 60),
+    'login_account': (5, 300),
+    'register_ip': (5, 600),
+}
+
+
+def _refill(tokens, updated, now, capacity, period):
+    if tokens is None:
+        return float(capacity)
+    return min(float(capacity), tokens + (now - updated) * capacity / period)
+
+
+def _retry_after(tokens, capacity, period):
+    return max(1, math.ceil((1 - tokens) * period / capacity))
+
+
+class MemoryStore(LRUCache):
+    # Per-worker buckets. An untouched bucket is full again after `period`,
+    # so entries expire then and LRU eviction only ever forgets buckets
+    # that are already partly refilled.
+    def take(self, key, capacity, period, cost=1):
+        with self._lock:
+            now = self.clock()
+            entry = self._entries.get(key)
+            tokens, updated = entry[1] if entry and entry[0] > now else (None, None)
+            tokens = _refill(tokens, updated, now, capacity, period)
+            allowed = tokens >= cost
+            if allowed:
+                tokens = min(float(capacity), tokens - cost)
+            self._entries[key] = (now + period, (tokens, now))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return None if allowed else _retry_after(tokens, capacity, period)
+
+
+class SQLiteStore:
+    # Buckets shared by every worker on the host, in their own small SQLite
+    # file so limiter writes never contend with the application database.
+    PURGE_EVERY = 1000
+
+    def __init__(self, path, timeout=5.0, clock=time.time):
+        self.path = path
+        self.timeout = timeout
+        self.clock = clock
+        self._local = threading.local()
+        self._ops = 0
+        self._max_period = max(period for _, period in DEFAULT_LIMITS.values())
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('CREATE TABLE IF NOT EXISTS rate_limit_buckets '
+                         '(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)')
+            self._local.conn = conn
+        return conn
+
+    def take(self, key, capacity, period, cost=1):
+        conn = self._connection()
+        now = self.clock()
+        self._max_period = max(self._max_period, period)
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT tokens, updated FROM rate_limit_buckets WHERE key = ?', (key,)).fetchone()
+            tokens = _refill(*(row or (None, None)), now, capacity, period)
+            allowed = tokens >= cost
+            if allowed:
+                tokens = min(float(capacity), tokens - cost)
+            conn.execute('INSERT INTO rate_limit_buckets (key, tokens, updated) VALUES (?, ?, ?) '
+                         'ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated',
+                         (key, tokens, now))
+            self._ops += 1
+            if self._ops % self.PURGE_EVERY == 0:
+                # Buckets idle longer than any period are full; drop them
+                conn.execute('DELETE FROM rate_limit_buckets WHERE updated < ?', (now - self._max_period,))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return None if allowed else _retry_after(tokens, capacity, period)
+
+
+class RateLimiter:
+    def __init__(self, limits=None, store=None):
+        self.limits = dict(limits or DEFAULT_LIMITS)
+        self.store = store or MemoryStore(maxsize=100000)
+        self.enabled = True
+
+    def init_app(self, app):
+        self.enabled = app.config.get('RATE_LIMIT_ENABLED', self.enabled)
+        self.limits.update(app.config.get('RATE_LIMITS', {}))
+        path = app.config.get('RATE_LIMIT_SQLITE_PATH')
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self.store = SQLiteStore(path)
+        else:
+            self.store.maxsize = app.config.get('RATE_LIMIT_SIZE', self.store.maxsize)
+
+    def hit(self, name, key):
+        # Spend one token from bucket `name` for `key`; returns None when
+        # allowed, otherwise the seconds until a token is available
+        if not self.enabled or key is None:
+            return None
+        capacity, period = self.limits[name]
+        return self.store.take(f'{name}:{key}', capacity, period)
+
+    def refund(self, name, key):
+        # Give back a token spent by hit(), e.g. when the attempt succeeded
+        if not self.enabled or key is None:
+            return
+        capacity, period = self.limits[name]
+        self.store.take(f'{name}:{key}', capacity, period, cost=-1)
+
+
+def init_app(app):
+    app.extensions['rate_limiter'] = instance = RateLimiter()
+    instance.init_app(app)
+
+
+rate_limiter = LocalProxy(lambda: current_app.extensions['rate_limiter'])
@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta
+
+from flask import Blueprint, request
+from flask_restful import Api, Resource
+from flask_login import current_user
+
+from models import db, SavingsAccount, to_minor, from_minor, is_amount
+from access import customer_required
+from dashboard import dashboard_cache
+import portfolio
+import ledger
+from conditional import versioned_response, SAVINGS_BALANCE
+from audit import audit_log
+
+
+bp = Blueprint('savings', __name__, url_prefix='/api')
+api = Api(bp)
+
+
+class Savings(Resource):
+    @customer_required
+    def get(self):
+        account_id = current_user.savings_account_id
+        response = versioned_response(SAVINGS_BALANCE, f'savings-{account_id}', SavingsAccount.id == account_id)
+        if response is None:
+            return {'error': 'Savings account not found'}, 404
+        return response
+
+    @customer_required
+    def post(self):
+        data = request.get_json()
+        amount = data.get('amount')
+        action = data.get('action')  # 'deposit' or 'withdraw'
+
+        if not is_amount(amount) or amount <= 0 or action not in ['deposit', 'withdraw']:
+            return {'error': 'Invalid request'}, 400
+
+        amount_minor = to_minor(amount)
+        if action == 'withdraw':
+            amount_minor = -amount_minor
+
+        try:
+            new_balance = ledger.post_entry(
+                current_user.savings_account_id, amount_minor, 'deposit' if action == 'deposit' else 'withdrawal'
+            )
+        except ledger.InsufficientFunds:
+            db.session.rollback()
+            return {'error': 'Insufficient funds'}, 400
+
+        portfolio.record_deposit_change(from_minor(amount_minor))
+        db.session.commit()
+        dashboard_cache.evict(current_user.id)
+        audit_log.record(f'savings.{action}', 'savings_account', current_user.savings_account_id,
+                         amount_minor=amount_minor, balance_minor=new_balance)
+        return {'message': f'{action.capitalize()} successful', 'new_balance': from_minor(new_balance)}, 200
+
+
+class SavingsStatement(Resource):
+    @customer_required
+    def get(self):
+        try:
+            end = datetime.fromisoformat(request.args['end']) if 'end' in request.args else datetime.utcnow()
+            start = datetime.fromisoformat(request.args['start']) if 'start' in request.args else end - timedelta(days=30)
+        except ValueError:
+            return {'error': 'Invalid date, expected ISO 8601'}, 400
+
+        opening, rows, closing = ledger.statement(current_user.savings_account_id, start, end)
+
+        return {
+            'start': start.isoformat(),
+            'end': end.isoformat(),
+            'opening_balance': from_minor(opening),
+            'closing_balance': from_minor(closing),
+            'transactions': [
+                {
+                    'id': entry.id,
+                    'kind': entry.kind,
+                    'amount': from_minor(entry.amount_minor),
+                    'balance': from_minor(balance),
+                    'reference': entry.reference,
+                    'created_at': entry.created_at.isoformat(),
+                }
+                for entry, balance in rows
+            ],
+        }, 200
+
+
+api.add_resource(Savings, '/savings')  # GET balance, POST deposit/withdraw
+api.add_resource(SavingsStatement, '/savings/statement')  # GET ?start=&end= (ISO 8601)
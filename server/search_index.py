@@ -0,0 +1,300 @@
+import os
+import threading
+from array import array
+
+import numpy as np
+from flask import current_app
+from sqlalchemy import func, select
+from werkzeug.local import LocalProxy
+
+from cache import read_signal, touch_signal
+from models import db, User, Customer
+
+
+FIELDS = ('username', 'email', 'national_id', 'account_number')
+SEPARATOR = '\x1f'
+PREFIX = '\x00'     # marks the 1- and 2-character prefix terms used by short queries
+CHUNK = 64          # first batch of candidates intersected; doubles each step
+RANK_WINDOW = 3     # matches gathered per requested result before ranking
+CATCH_UP_LAG = 1000  # ids below the watermark re-checked, for inserts that committed out of id order
+
+
+def _terms(fields):
+    # Trigrams of every field plus 1/2-character prefixes for short queries.
+    # Only the local part of an email is indexed; domains would put most
+    # customers in the same few postings.
+    terms = set()
+    for name, value in zip(FIELDS, fields):
+        if not value:
+            continue
+        value = value.lower()
+        if name == 'email':
+            value = value.split('@', 1)[0]
+        terms.add(PREFIX + value[:1])
+        terms.add(PREFIX + value[:2])
+        terms.update(value[i:i + 3] for i in range(len(value) - 2))
+    return terms
+
+
+class TrigramIndex:
+    # Documents are numbered in insertion order, so every posting list is
+    # an ascending uint32 array and intersections are binary searches.
+    # Document text lives in one bytearray; an update appends a new
+    # document and tombstones the old one.
+    def __init__(self):
+        self.postings = {}             # term -> array('I') of documents
+        self.users = array('I')        # document -> user id
+        self.offsets = array('Q', [0])  # document text is blob[offsets[d]:offsets[d + 1]]
+        self.blob = bytearray()
+        self.alive = bytearray()
+        self.documents = array('i')    # user id -> document, -1 if absent
+        self.live = 0
+
+    def add(self, user_id, fields):
+        self.remove(user_id)
+        document = len(self.users)
+        self.users.append(user_id)
+        self.blob += SEPARATOR.join(value or '' for value in fields).encode()
+        self.offsets.append(len(self.blob))
+        self.alive.append(1)
+        if user_id >= len(self.documents):
+            grow = max(user_id + 1, 2 * len(self.documents)) - len(self.documents)
+            self.documents.extend(array('i', [-1]) * grow)
+        self.documents[user_id] = document
+        self.live += 1
+        for term in _terms(fields):
+            posting = self.postings.get(term)
+            if posting is None:
+                posting = self.postings[term] = array('I')
+            posting.append(document)
+
+    def __contains__(self, user_id):
+        return user_id < len(self.documents) and self.documents[user_id] >= 0
+
+    def remove(self, user_id):
+        if user_id in self:
+            self.alive[self.documents[user_id]] = 0
+            self.documents[user_id] = -1
+            self.live -= 1
+
+    def text(self, document):
+        return bytes(self.blob[self.offsets[document]:self.offsets[document + 1]])
+
+    def fields(self, document):
+        return self.text(document).decode().split(SEPARATOR)
+
+    def user_ids(self):
+        alive = np.frombuffer(self.alive, dtype=np.uint8).view(bool)
+        return np.frombuffer(self.users, dtype=np.uint32)[alive]
+
+    def search(self, query, limit=20):
+        query = query.strip().lower()
+        if not query:
+            return []
+        if len(query) < 3:
+            terms = {PREFIX + query}
+        else:
+            terms = {query[i:i + 3] for i in range(len(query) - 2)}
+
+        postings = []
+        for term in terms:
+            posting = self.postings.get(term)
+            if posting is None:
+                return []
+            postings.append(np.frombuffer(posting, dtype=np.uint32))
+        postings.sort(key=len)
+        smallest, others = postings[0], postings[1:]
+
+        # Trigrams only narrow the candidates; the substring is confirmed on
+        # the lowercased document, where fields are separator-delimited.
+        # bytes.lower() only agrees with the str.lower() the terms were built
+        # with for ASCII, so other documents are decoded first.
+        needle = query.encode()
+        field_start = SEPARATOR.encode() + needle
+        text_field_start = SEPARATOR + query
+        wanted = limit * RANK_WINDOW
+        matches = []
+        start, step = 0, CHUNK
+        while start < len(smallest) and len(matches) < wanted:
+            candidates = smallest[start:start + step]
+            start, step = start + step, step * 2
+            for posting in others:
+                found = np.minimum(np.searchsorted(posting, candidates), len(posting) - 1)
+                candidates = candidates[posting[found] == candidates]
+                if not len(candidates):
+                    break
+            for document in candidates.tolist():
+                if not self.alive[document]:
+                    continue
+                text = self.text(document)
+                if text.isascii() and needle.isascii():
+                    text = text.lower()
+                    prefix = text.startswith(needle) or field_start in text
+                    found = needle in text
+                else:
+                    text = text.decode().lower()
+                    prefix = text.startswith(query) or text_field_start in text
+                    found = query in text
+                if prefix or (len(query) >= 3 and found):
+                    matches.append((not prefix, document))
+                    if len(matches) >= wanted:
+                        break
+
+        matches.sort()
+        return [
+            {'id': self.users[document], **dict(zip(FIELDS, (value or None for value in self.fields(document))))}
+            for _, document in matches[:limit]
+        ]
+
+    def stats(self):
+        return {
+            'customers': self.live,
+            'documents': len(self.users),
+            'terms': len(self.postings),
+            'postings': sum(len(posting) for posting in self.postings.values()),
+            'bytes': len(self.blob) + self.offsets.itemsize * len(self.offsets) + self.users.itemsize * len(self.users)
+            + self.documents.itemsize * len(self.documents)
+            + sum(posting.itemsize * len(posting) for posting in self.postings.values()),
+        }
+
+
+class CustomerSearch:
+    # Per-process index over customers for staff lookup. It is built in a
+    # background thread when a web worker serves its first request (CLI
+    # processes never pay for it); changes committed during the build are
+    # queued and replayed onto the new index.
+    #
+    # Changes made by other processes (workers, flask import-customers,
+    # generate_data) are announced by bumping the mtime of a signal file,
+    # as settings_cache does. A search that sees a new mtime first indexes
+    # customers above the id watermark and, if the customer count still
+    # disagrees, diffs the full id set to drop deleted ones.
+    def __init__(self):
+        self.enabled = True
+        self.app = None
+        self.signal_path = None
+        self._index = None
+        self._pending = None
+        self._pid = None
+        self._signal = None
+        self._watermark = 0
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config.get('CUSTOMER_SEARCH_ENABLED', self.enabled)
+        self.signal_path = app.config.get(
+            'CUSTOMER_SEARCH_SIGNAL_FILE', os.path.join(app.instance_path, 'customers.version')
+        )
+        if self.enabled:
+            app.before_request(self._ensure_built)
+
+    @property
+    def ready(self):
+        return self._index is not None and self._pid == os.getpid()
+
+    def _ensure_built(self):
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._index, self._pending, self._pid = None, [], os.getpid()
+                    threading.Thread(target=self.rebuild, name='customer-index', daemon=True).start()
+
+    def changed(self):
+        # Tell every process to catch up; call after the commit
+        if not self.enabled or not self.signal_path:
+            return
+        touch_signal(self.signal_path)
+
+    def _customers(self, *criteria):
+        return db.session.execute(
+            select(User.id, User.username, User.email, Customer.national_id, Customer.account_number)
+            .join(Customer, Customer.id == User.id).where(*criteria)
+            .execution_options(yield_per=10000)
+        )
+
+    def rebuild(self):
+        index = TrigramIndex()
+        # Read first: anything committed during the build bumps it again
+        signal = read_signal(self.signal_path)
+        with self.app.app_context():
+            for user_id, *fields in self._customers():
+                index.add(user_id, fields)
+            db.session.remove()
+        with self._lock:
+            for method, args in self._pending or ():
+                getattr(index, method)(*args)
+            self._index, self._pending = index, None
+            self._signal = signal
+            self._watermark = max(index.users, default=0)
+
+    def _catch_up(self):
+        signal = read_signal(self.signal_path)
+        if signal == self._signal or not self._sync_lock.acquire(blocking=False):
+            return  # up to date, or another request is already catching up
+        try:
+            self._signal = signal
+            rows = self._customers(User.id > self._watermark - CATCH_UP_LAG).all()
+            count = db.session.execute(select(func.count()).select_from(Customer)).scalar()
+            with self._lock:
+                for user_id, *fields in rows:
+                    if user_id not in self._index:
+                        self._index.add(user_id, fields)
+                    self._watermark = max(self._watermark, user_id)
+                if self._index.live == count:
+                    return
+
+            # Deletions, or inserts older than the lag: compare the id sets
+            present = np.fromiter(db.session.execute(select(Customer.id)).scalars(), dtype=np.uint32)
+            with self._lock:
+                indexed = self._index.user_ids()
+                for user_id in np.setdiff1d(indexed, present).tolist():
+                    self._index.remove(user_id)
+                missing = np.setdiff1d(present, indexed).tolist()
+            if missing:
+                rows = self._customers(User.id.in_(missing)).all()
+                with self._lock:
+                    for user_id, *fields in rows:
+                        self._index.add(user_id, fields)
+        finally:
+            self._sync_lock.release()
+
+    def _apply(self, method, *args):
+        if not self.enabled or self._pid != os.getpid():
+            return  # nothing built in this process; a later build reads the database
+        with self._lock:
+            if self._index is None:
+                self._pending.append((method, args))
+            else:
+                getattr(self._index, method)(*args)
+
+    def index_customer(self, user_id, username, email, national_id=None, account_number=None, broadcast=True):
+        # Call after the commit that created or changed the customer; bulk
+        # writers pass broadcast=False and call changed() once per batch
+        self._apply('add', user_id, (username, email, national_id, account_number))
+        if broadcast:
+            self.changed()
+
+    def remove(self, user_id):
+        self._apply('remove', user_id)
+        self.changed()
+
+    def search(self, query, limit=20):
+        self._catch_up()
+        # Holding the lock keeps appends from resizing postings under the numpy views
+        with self._lock:
+            return self._index.search(query, limit)
+
+    def stats(self):
+        self._catch_up()
+        with self._lock:
+            return self._index.stats()
+
+
+def init_app(app):
+    app.extensions['customer_search'] = instance = CustomerSearch()
+    instance.init_app(app)
+
+
+customer_search = LocalProxy(lambda: current_app.extensions['customer_search'])
@@ -1,67 +1,43 @@
-from app import app
-from models import db, User, Loan, Customer, Staff, Admin
-from werkzeug.security import generate_password_hash
-
-# Creating some sample users and loan data
-def seed_data():
+from app import create_app
+import portfolio
+from models import db, User, Loan, Customer, Staff, Admin, LoanSettings, SavingsAccount
+
+# Creating some sample users and loan data.
+# For large load-test datasets use generate_data.py instead.
+def seed_data(app=None):
+    app = app or create_app()
     with app.app_context():
         # Clear existing data
         db.drop_all()
         db.create_all()
 
-        # Create Admin User
+        db.session.add(LoanSettings(default_interest_rate=5.5))
+
+        # Create Admin User and Profile
         admin = User(username="adminuser", email="admin@example.com", role="admin")
         admin.set_password("admin1234")
-        db.session.add(admin)
-        db.session.commit()
-
-        # Create Admin Profile
-        admin_profile = Admin(user=admin, access_level="full", is_superuser=True)
-        db.session.add(admin_profile)
-        db.session.commit()
+        db.session.add(Admin(user=admin, access_level="full", is_superuser=True))
 
-        # Create Staff User
+        # Create Staff User and Profile
         staff = User(username="staffuser", email="staff@example.com", role="staff")
         staff.set_password("staff1234")
-        db.session.add(staff)
-        db.session.commit()
-
-        # Create Staff Profile
-        staff_profile = Staff(user=staff, employee_id="S001", department="Loans")
-        db.session.add(staff_profile)
-        db.session.commit()
-
-        # Create Customer Users with Loans
-        customer_1 = User(username="customer1", email="customer1@example.com", role="customer")
-        customer_1.set_password("customer1234")
-        db.session.add(customer_1)
-        db.session.commit()
-
-        # Create Customer Profile for Customer 1
-        customer_profile_1 = Customer(user=customer_1, account_number="C001", address="123 Main St", national_id="1234567890")
-        db.session.add(customer_profile_1)
-        db.session.commit()
-
-        # Create Loans for Customer 1
-        loan_1 = Loan(amount=5000, interest_rate=5.5, loan_duration=12, customer_id=customer_1.id)
-        db.session.add(loan_1)
-
-        customer_2 = User(username="customer2", email="customer2@example.com", role="customer")
-        customer_2.set_password("customer1234")
-        db.session.add(customer_2)
-        db.session.commit()
-
-        # Create Customer Profile for Customer 2
-        customer_profile_2 = Customer(user=customer_2, account_number="C002", address="456 Elm St", national_id="9876543210")
-        db.session.add(customer_profile_2)
-        db.session.commit()
-
-        # Create Loans for Customer 2
-        loan_2 = Loan(amount=10000, interest_rate=6.0, loan_duration=24, customer_id=customer_2.id)
-        db.session.add(loan_2)
-
-        # Commit all data to the database
-        db.session.commit()
+        db.session.add(Staff(user=staff, employee_id="S001", department="Loans"))
+
+        # Create Customer Users with Profiles, Savings and Loans
+        customers = [
+            ("customer1", "C001", "123 Main St", "1234567890", 5000, 5.5, 12),
+            ("customer2", "C002", "456 Elm St", "9876543210", 10000, 6.0, 24),
+        ]
+        for username, account_number, address, national_id, amount, rate, duration in customers:
+            user = User(username=username, email=f"{username}@example.com", role="customer")
+            user.set_password("customer1234")
+            profile = Customer(user=user, account_number=account_number, address=address, national_id=national_id)
+            db.session.add(SavingsAccount(customer=profile, balance=0.0))
+            user.loans.append(Loan(amount=amount, interest_rate=rate, loan_duration=duration))
+
+        # Commit all data to the database in one transaction
+        db.session.commit()
+        portfolio.rebuild()
 
         print("Database seeded successfully.")
 
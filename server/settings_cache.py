@@ -0,0 +1,66 @@
+import os
+import threading
+import time
+
+from flask import current_app
+from werkzeug.local import LocalProxy
+
+from cache import read_signal, touch_signal
+from models import LoanSettings
+
+
+class SettingsCache:
+    # Caches a plain (detached) value for `ttl` seconds. Other workers are
+    # told to drop their copy by bumping the mtime of a shared signal file,
+    # which costs a stat() per read instead of a query.
+    def __init__(self, loader, ttl=300, signal_path=None, clock=time.monotonic):
+        self.loader = loader
+        self.ttl = ttl
+        self.signal_path = signal_path
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._value = None
+        self._loaded = False
+        self._expires = 0.0
+        self._signal = None
+
+    def init_app(self, app):
+        self.ttl = app.config.get('LOAN_SETTINGS_CACHE_TTL', self.ttl)
+        self.signal_path = app.config.get(
+            'SETTINGS_SIGNAL_FILE', os.path.join(app.instance_path, 'settings.version')
+        )
+
+    def get(self):
+        signal = read_signal(self.signal_path)
+        if self._loaded and self.clock() < self._expires and signal == self._signal:
+            return self._value
+
+        with self._lock:
+            if not (self._loaded and self.clock() < self._expires and signal == self._signal):
+                self._value = self.loader()
+                self._loaded = True
+                self._expires = self.clock() + self.ttl
+                self._signal = signal
+            return self._value
+
+    def invalidate(self, broadcast=True):
+        # Call after the change is committed, so other workers reload the new value
+        with self._lock:
+            self._loaded = False
+        if broadcast and self.signal_path:
+            touch_signal(self.signal_path)
+
+
+def _load_loan_settings():
+    settings = LoanSettings.query.first()
+    if not settings:
+        return None
+    return {'default_interest_rate': settings.default_interest_rate}
+
+
+def init_app(app):
+    app.extensions['loan_settings'] = instance = SettingsCache(_load_loan_settings)
+    instance.init_app(app)
+
+
+loan_settings = LocalProxy(lambda: current_app.extensions['loan_settings'])
@@ -0,0 +1,54 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app  # noqa: E402
+import seed  # noqa: E402
+
+
+@pytest.fixture
+def config(tmp_path):
+    # Passing the same config to create_app again gives a second "worker"
+    # on the same database and signal files
+    return {
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "test.db"}',
+        'AUDIT_ENABLED': False,
+        'CUSTOMER_SEARCH_ENABLED': False,
+        'RATE_LIMIT_ENABLED': False,
+        'SETTINGS_SIGNAL_FILE': str(tmp_path / 'settings.version'),
+        'IDENTITY_SIGNAL_FILE': str(tmp_path / 'identity.version'),
+        'CUSTOMER_SEARCH_SIGNAL_FILE': str(tmp_path / 'customers.version'),
+        'IMPORT_REJECTS_DIR': str(tmp_path / 'imports'),
+    }
+
+
+@pytest.fixture
+def app(config):
+    app = create_app(config)
+    seed.seed_data(app)
+    return app
+
+
+def login(app, email, password):
+    client = app.test_client()
+    response = client.post('/api/login', json={'email': email, 'password': password})
+    assert response.status_code == 200
+    return client
+
+
+@pytest.fixture
+def customer(app):
+    return login(app, 'customer1@example.com', 'customer1234')
+
+
+@pytest.fixture
+def staff(app):
+    return login(app, 'staff@example.com', 'staff1234')
+
+
+@pytest.fixture
+def admin(app):
+    return login(app, 'admin@example.com', 'admin1234')
@@ -0,0 +1,42 @@
+from datetime import date, timedelta
+
+import accrual
+from models import db, Loan, User
+
+
+def _approved_loan(app, staff):
+    with app.app_context():
+        user_id = User.query.filter_by(username='customer1').one().id
+        loan_id = Loan.query.filter_by(customer_id=user_id).one().id
+    assert staff.put(f'/api/loan/{loan_id}/manage', json={'status': 'approved'}).status_code == 200
+    return loan_id
+
+
+def test_accrued_interest_is_shown_and_repaid_first(app, customer, staff):
+    loan_id = _approved_loan(app, staff)
+    with app.app_context():
+        db.session.execute(db.update(Loan).where(Loan.id == loan_id).values(accrued_through=date.today() - timedelta(days=10)))
+        db.session.commit()
+        run = accrual.run_accrual(date.today())
+        assert run.loans_accrued == 1
+    # 5000 at 5.5% for 10 days
+    expected = round(5000 * 5.5 / 100 * 10 / 365, 2)
+
+    assert round(customer.get(f'/api/loan/{loan_id}').get_json()['accrued_interest'], 2) == expected
+    assert round(customer.get(f'/api/loan/{loan_id}/schedule').get_json()['accrued_interest'], 2) == expected
+
+    customer.post('/api/savings', json={'action': 'deposit', 'amount': 1000})
+    body = customer.post(f'/api/loan/{loan_id}/repay', json={'amount': 100}).get_json()
+    assert body['interest_paid'] == expected
+    assert body['accrued_interest'] == 0
+    assert body['remaining_loan_amount'] == round(5000 - (100 - expected), 2)
+
+
+def test_accrual_rejects_future_dates(app):
+    runner = app.test_cli_runner()
+    tomorrow = date.today() + timedelta(days=1)
+    result = runner.invoke(accrual.run_command, ['--date', tomorrow.isoformat(), '--workers', '1'])
+    assert result.exit_code == 2
+    assert 'future date' in result.output
+    with app.app_context():
+        assert accrual.AccrualRun.query.count() == 0
@@ -0,0 +1,17 @@
+from app import create_app
+
+
+def test_apps_do_not_share_extensions(tmp_path):
+    first = create_app({
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "first.db"}',
+        'RATE_LIMITS': {'login_ip': (1, 60)},
+    })
+    second = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "second.db"}'})
+
+    for name in ('loan_settings', 'identity_cache', 'password_hasher', 'dashboard_cache', 'rate_limiter',
+                 'auth_tokens', 'audit_log', 'customer_search', 'profiler', 'metrics'):
+        assert first.extensions[name] is not second.extensions[name], name
+    # One app's RATE_LIMITS must not leak into the next
+    assert first.extensions['rate_limiter'].limits['login_ip'] == (1, 60)
+    assert second.extensions['rate_limiter'].limits['login_ip'] != (1, 60)
+    assert second.extensions['customer_search'].app is second
@@ -0,0 +1,28 @@
+from app import create_app
+from identity import get_principal
+from models import User
+
+
+def _user_id(app, username):
+    with app.app_context():
+        return User.query.filter_by(username=username).one().id
+
+
+def test_role_change_reaches_other_workers(app, config, admin):
+    other = create_app(config)
+    user_id = _user_id(app, 'customer1')
+    with other.app_context():
+        assert get_principal(user_id).role == 'customer'  # now cached in the other worker
+
+    assert admin.put(f'/api/user/{user_id}', json={'role': 'staff'}).status_code == 200
+
+    with other.app_context():
+        assert get_principal(user_id).role == 'staff'
+
+
+def test_cache_survives_unrelated_requests(app, config):
+    other = create_app(config)
+    user_id = _user_id(app, 'customer1')
+    with other.app_context():
+        first = get_principal(user_id)
+        assert get_principal(user_id) is first
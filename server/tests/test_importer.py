@@ -0,0 +1,48 @@
+import csv
+
+from models import User
+
+HEADER = 'username,email,password,opening_balance\n'
+
+
+def _import(client, body):
+    return client.post('/api/admin/import/customers', data=body.encode(), content_type='text/csv')
+
+
+def _usernames(app):
+    with app.app_context():
+        return {user.username for user in User.query.filter(User.username.like('imp%'))}
+
+
+def test_non_finite_numbers_are_rejected_per_row(app, admin):
+    response = _import(admin, HEADER + 'imp1,imp1@example.com,,nan\nimp2,imp2@example.com,,inf\nimp3,imp3@example.com,,10\n')
+    body = response.get_json()
+    assert response.status_code == 200
+    assert (body['imported'], body['rejected']) == (1, 2)
+    with open(body['rejects_file'], newline='') as f:
+        assert [row['error'] for row in csv.DictReader(f)] == ['Invalid number', 'Invalid number']
+    assert _usernames(app) == {'imp3'}
+
+
+def test_broken_file_reports_what_was_committed(app, admin):
+    body = HEADER + 'imp1,imp1@example.com,,5\nimp2,not-an-email,,5\nimp3,imp3@example.com,,' + 'x' * 140000 + '\nimp4,imp4@example.com,,5\n'
+    response = _import(admin, body)
+    result = response.get_json()
+
+    assert response.status_code == 400
+    assert 'field larger than field limit' in result['error']
+    assert (result['imported'], result['rejected'], result['line']) == (1, 1, 4)
+    with open(result['rejects_file'], newline='') as f:
+        assert [row['username'] for row in csv.DictReader(f)] == ['imp2']
+    assert _usernames(app) == {'imp1'}
+
+    # Resending from the failing line picks up where the import stopped
+    retry = _import(admin, HEADER + 'imp4,imp4@example.com,,5\n')
+    assert (retry.status_code, retry.get_json()['imported']) == (200, 1)
+
+
+def test_missing_columns_fail_at_the_header(admin):
+    response = _import(admin, 'name,mail\nx,y\n')
+    assert response.status_code == 400
+    assert response.get_json()['line'] == 1
+    assert response.get_json()['imported'] == 0
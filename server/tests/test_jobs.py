@@ -0,0 +1,132 @@
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+import jobs
+from models import db, Job
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    calls = []
+
+    def record(payload):
+        calls.append(payload)
+        if payload.get('fail'):
+            raise RuntimeError('boom')
+
+    monkeypatch.setitem(jobs.HANDLERS, 'test.record', record)
+    return calls
+
+
+def _enqueue(app, *payloads, **kwargs):
+    with app.app_context():
+        created = [jobs.enqueue('test.record', payload, **kwargs) for payload in payloads]
+        db.session.commit()
+        return [job.id for job in created]
+
+
+def _job(app, job_id):
+    with app.app_context():
+        job = db.session.get(Job, job_id)
+        db.session.expunge(job)
+        return job
+
+
+def test_enqueue_rejects_unknown_kinds(app):
+    with app.app_context(), pytest.raises(ValueError):
+        jobs.enqueue('test.unknown', {})
+
+
+def test_each_due_job_is_claimed_once(app, calls):
+    due = _enqueue(app, *({'n': n} for n in range(20)))
+    later = _enqueue(app, {'n': 'later'}, delay=3600)
+    claimed = []
+
+    def claim(worker):
+        with app.app_context():
+            while True:
+                ids = jobs.claim(worker, limit=3)
+                if not ids:
+                    break
+                claimed.extend(ids)
+
+    threads = [threading.Thread(target=claim, args=(f'worker-{n}',)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(claimed) == due
+    job = _job(app, due[0])
+    assert (job.status, job.attempts) == ('running', 1)
+    assert _job(app, later[0]).status == 'queued'
+
+
+def test_run_job_completes_only_its_own_claim(app, calls):
+    job_id, = _enqueue(app, {'n': 1})
+    with app.app_context():
+        assert jobs.claim('worker-a') == [job_id]
+        assert jobs.run_job(job_id, 'worker-b') is None
+        assert jobs.run_job(job_id, 'worker-a') == 'done'
+    assert calls == [{'n': 1}]
+    job = _job(app, job_id)
+    assert (job.status, job.locked_by) == ('done', None)
+
+
+def test_failures_back_off_then_fail(app, calls, monkeypatch):
+    app.config['JOB_BACKOFF_BASE'] = 10
+    waits = []
+    monkeypatch.setattr(jobs.random, 'uniform', lambda low, high: waits.append(high) or high)
+    job_id, = _enqueue(app, {'fail': True}, max_attempts=3)
+
+    for attempt in (1, 2):
+        with app.app_context():
+            db.session.execute(db.update(Job).where(Job.id == job_id).values(run_at=datetime.utcnow()))
+            db.session.commit()
+            before = datetime.utcnow()
+            assert jobs.claim('worker') == [job_id]
+            assert jobs.run_job(job_id, 'worker') == 'queued'
+        job = _job(app, job_id)
+        assert (job.attempts, job.locked_by) == (attempt, None)
+        assert 'RuntimeError: boom' in job.last_error
+        assert job.run_at >= before + timedelta(seconds=10 * 2 ** (attempt - 1))
+        with app.app_context():
+            assert jobs.claim('worker') == []  # not due until the backoff elapses
+
+    assert waits == [10, 20]
+    with app.app_context():
+        db.session.execute(db.update(Job).where(Job.id == job_id).values(run_at=datetime.utcnow()))
+        db.session.commit()
+        assert jobs.claim('worker') == [job_id]
+        assert jobs.run_job(job_id, 'worker') == 'failed'
+    job = _job(app, job_id)
+    assert (job.status, job.attempts) == ('failed', 3)
+    assert job.finished_at is not None
+
+
+def test_backoff_is_bounded_by_the_attempt(monkeypatch):
+    monkeypatch.setattr(jobs.random, 'uniform', lambda low, high: (low, high))
+    assert [jobs.backoff(attempt, 5) for attempt in (1, 2, 3)] == [(0, 5), (0, 10), (0, 20)]
+
+
+def test_requeue_stale_recovers_expired_leases(app, calls):
+    fresh, stale, spent = _enqueue(app, {'n': 1}, {'n': 2}, {'n': 3})
+    with app.app_context():
+        assert jobs.claim('worker') == [fresh, stale, spent]
+        expired = datetime.utcnow() - timedelta(seconds=600)
+        db.session.execute(db.update(Job).where(Job.id.in_([stale, spent])).values(locked_at=expired))
+        db.session.execute(db.update(Job).where(Job.id == spent).values(max_attempts=1))
+        db.session.commit()
+        assert jobs.requeue_stale(300) == (1, 1)
+
+    assert (_job(app, fresh).status, _job(app, fresh).locked_by) == ('running', 'worker')
+    assert (_job(app, stale).status, _job(app, stale).locked_by) == ('queued', None)
+    assert (_job(app, spent).status, _job(app, spent).last_error) == ('failed', 'Lease expired')
+    # The dead worker's late completion is discarded; the job runs again on a new claim
+    with app.app_context():
+        assert jobs.run_job(stale, 'worker') is None
+        assert jobs.claim('worker-2') == [stale]
+        assert jobs.run_job(stale, 'worker-2') == 'done'
+    assert _job(app, stale).attempts == 2
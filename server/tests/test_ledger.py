@@ -0,0 +1,113 @@
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+import ledger
+from models import db, Loan, SavingsAccount, User
+from conftest import login
+
+
+def _customer_ids(app, username='customer1'):
+    with app.app_context():
+        user = User.query.filter_by(username=username).one()
+        loan = Loan.query.filter_by(customer_id=user.id).one()
+        return user.customer.savings_account.id, loan.id
+
+
+def _balance(app, account_id):
+    with app.app_context():
+        return db.session.get(SavingsAccount, account_id).balance
+
+
+def _concurrently(clients, request):
+    barrier = threading.Barrier(len(clients))
+    statuses = [None] * len(clients)
+
+    def run(index, client):
+        barrier.wait()
+        statuses[index] = request(client).status_code
+
+    threads = [threading.Thread(target=run, args=(index, client)) for index, client in enumerate(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return statuses
+
+
+def test_concurrent_withdrawals_never_overdraw(app, customer):
+    account_id, _ = _customer_ids(app)
+    assert customer.post('/api/savings', json={'action': 'deposit', 'amount': 500}).status_code == 200
+
+    clients = [login(app, 'customer1@example.com', 'customer1234') for _ in range(8)]
+    statuses = _concurrently(clients, lambda client: client.post(
+        '/api/savings', json={'action': 'withdraw', 'amount': 100}))
+
+    assert sorted(statuses) == [200] * 5 + [400] * 3
+    assert _balance(app, account_id) == 0
+
+
+def test_withdrawal_beyond_balance_is_rejected(app, customer):
+    account_id, _ = _customer_ids(app)
+    customer.post('/api/savings', json={'action': 'deposit', 'amount': 50})
+
+    response = customer.post('/api/savings', json={'action': 'withdraw', 'amount': 50.01})
+    assert response.status_code == 400
+    assert _balance(app, account_id) == 50
+
+
+@pytest.mark.parametrize('amount', [True, '10', None, float('nan'), float('inf')])
+def test_non_numeric_amounts_are_rejected(customer, amount):
+    # Flask's JSON parser accepts NaN and Infinity literals
+    assert customer.post('/api/savings', json={'action': 'deposit', 'amount': amount}).status_code == 400
+    assert customer.post('/api/loan/apply', json={'amount': amount, 'loan_duration': 12}).status_code == 400
+    assert customer.post('/api/loan/1/repay', json={'amount': amount}).status_code == 400
+
+
+def test_concurrent_repayments_apply_every_debit(app, customer, staff):
+    account_id, loan_id = _customer_ids(app)
+    assert staff.put(f'/api/loan/{loan_id}/manage', json={'status': 'approved'}).status_code == 200
+    customer.post('/api/savings', json={'action': 'deposit', 'amount': 10000})
+
+    clients = [login(app, 'customer1@example.com', 'customer1234') for _ in range(8)]
+    statuses = _concurrently(clients, lambda client: client.post(
+        f'/api/loan/{loan_id}/repay', json={'amount': 1000}))
+
+    # 5000 outstanding: five repayments clear it, the rest find it repaid
+    assert sorted(statuses) == [200] * 5 + [409] * 3
+    assert _balance(app, account_id) == 5000
+    with app.app_context():
+        loan = db.session.get(Loan, loan_id)
+        assert (loan.amount, loan.status) == (0, 'repaid')
+
+
+def test_repaying_an_unapproved_loan_conflicts(app, customer):
+    _, loan_id = _customer_ids(app)
+    customer.post('/api/savings', json={'action': 'deposit', 'amount': 100})
+    assert customer.post(f'/api/loan/{loan_id}/repay', json={'amount': 10}).status_code == 409
+
+    _, other_loan_id = _customer_ids(app, 'customer2')
+    assert customer.post(f'/api/loan/{other_loan_id}/repay', json={'amount': 10}).status_code == 404
+
+
+def test_statement_matches_across_a_snapshot(app, customer):
+    account_id, _ = _customer_ids(app)
+    for amount in (100, 250):
+        customer.post('/api/savings', json={'action': 'deposit', 'amount': amount})
+    with app.app_context():
+        assert ledger.snapshot_balances() == 1
+    customer.post('/api/savings', json={'action': 'withdraw', 'amount': 75})
+    customer.post('/api/savings', json={'action': 'deposit', 'amount': 10})
+
+    with app.app_context():
+        start, end = datetime.utcnow() - timedelta(days=1), datetime.utcnow() + timedelta(seconds=1)
+        opening, rows, closing = ledger.statement(account_id, start, end)
+        assert opening == 0
+        assert [balance for _, balance in rows] == [10000, 35000, 27500, 28500]
+        assert closing == ledger.balance_at(account_id, end) == 28500
+        # Up to the snapshot's own time, balances replay from the ledger alone
+        assert ledger.balance_at(account_id, rows[1][0].created_at) == 35000
+
+    body = customer.get('/api/savings/statement').get_json()
+    assert (body['opening_balance'], body['closing_balance']) == (0, 285)
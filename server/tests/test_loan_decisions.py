@@ -0,0 +1,63 @@
+import pytest
+
+from models import db, Loan
+
+
+def _loan_ids(app):
+    with app.app_context():
+        return [loan_id for loan_id, in db.session.query(Loan.id).order_by(Loan.id)]
+
+
+@pytest.mark.parametrize('decision', [
+    {'loan_id': True, 'status': 'approved'},  # bool is an int subclass
+    {'loan_id': '1', 'status': 'approved'},
+    {'loan_id': 1.0, 'status': 'approved'},
+    {'loan_id': 1, 'status': 'pending'},
+    'approve 1',
+])
+def test_batch_rejects_invalid_decisions(staff, decision):
+    response = staff.put('/api/loans/manage', json={'decisions': [decision]})
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Invalid decision'
+
+
+def test_batch_rejects_duplicates_and_oversized_batches(app, staff):
+    loan_id = _loan_ids(app)[0]
+    duplicate = [{'loan_id': loan_id, 'status': 'approved'}, {'loan_id': loan_id, 'status': 'rejected'}]
+    assert staff.put('/api/loans/manage', json={'decisions': duplicate}).status_code == 400
+
+    oversized = [{'loan_id': index, 'status': 'approved'} for index in range(1, 1002)]
+    assert staff.put('/api/loans/manage', json={'decisions': oversized}).status_code == 400
+    assert staff.put('/api/loans/manage', json={'decisions': []}).status_code == 400
+
+    # Nothing was decided
+    with app.app_context():
+        assert db.session.get(Loan, loan_id).status == 'pending'
+
+
+def test_batch_decides_pending_loans_and_skips_the_rest(app, staff):
+    first, second = _loan_ids(app)
+    assert staff.put(f'/api/loan/{second}/manage', json={'status': 'rejected'}).status_code == 200
+
+    response = staff.put('/api/loans/manage', json={'decisions': [
+        {'loan_id': first, 'status': 'approved'},
+        {'loan_id': second, 'status': 'approved'},
+        {'loan_id': 999999, 'status': 'rejected'},
+    ]})
+    body = response.get_json()
+    assert response.status_code == 200
+    assert (body['approved'], body['rejected'], body['skipped']) == (1, 0, 2)
+    assert [result['result'] for result in body['results']] == ['approved', 'skipped', 'skipped']
+    assert body['results'][1]['reason'] == 'Loan is rejected'
+    assert body['results'][2]['reason'] == 'Loan not found'
+
+
+def test_single_decision_requires_a_pending_loan(app, staff):
+    loan_id = _loan_ids(app)[0]
+    assert staff.put(f'/api/loan/{loan_id}/manage', json={'status': 'approved'}).status_code == 200
+    assert staff.put(f'/api/loan/{loan_id}/manage', json={'status': 'rejected'}).status_code == 409
+    assert staff.put('/api/loan/999999/manage', json={'status': 'rejected'}).status_code == 404
+
+
+def test_customers_cannot_decide_loans(customer):
+    assert customer.put('/api/loans/manage', json={'decisions': [{'loan_id': 1, 'status': 'approved'}]}).status_code == 403
@@ -0,0 +1,60 @@
+import pytest
+
+from models import db, Loan, User
+
+
+@pytest.fixture
+def loans(app):
+    # Repeated amounts, so pages have to break ties on id
+    with app.app_context():
+        customer_ids = [user.id for user in User.query.filter_by(role='customer').order_by(User.id)]
+        for index in range(40):
+            db.session.add(Loan(amount=[100, 250, 250, 900][index % 4], interest_rate=5.5, loan_duration=12,
+                                status='approved' if index % 3 else 'pending', customer_id=customer_ids[index % 2]))
+        db.session.commit()
+        return [(loan.id, loan.amount, loan.status, loan.customer_id) for loan in Loan.query]
+
+
+def _walk(client, query, limit=7):
+    seen, cursor = [], None
+    while True:
+        url = f'/api/loans?{query}&limit={limit}' + (f'&cursor={cursor}' if cursor else '')
+        body = client.get(url).get_json()
+        assert len(body['loans']) <= limit
+        seen += [loan['loan_id'] for loan in body['loans']]
+        cursor = body['next_cursor']
+        if cursor is None:
+            return seen
+
+
+@pytest.mark.parametrize('sort, key', [
+    ('id', lambda loan: loan[0]),
+    ('-id', lambda loan: -loan[0]),
+    ('amount', lambda loan: (loan[1], loan[0])),
+    ('-amount', lambda loan: (-loan[1], -loan[0])),
+])
+def test_cursor_walk_returns_every_loan_once_in_order(staff, loans, sort, key):
+    expected = [loan[0] for loan in sorted(loans, key=key)]
+    assert _walk(staff, f'sort={sort}') == expected
+
+
+def test_cursor_walk_keeps_filters(staff, loans):
+    expected = [loan[0] for loan in sorted(loans, key=lambda loan: (-loan[1], -loan[0]))
+                if loan[2] == 'approved' and 200 <= loan[1] <= 900]
+    assert _walk(staff, 'sort=-amount&status=approved&min_amount=200&max_amount=900', limit=4) == expected
+
+
+def test_customers_page_through_their_own_loans(app, customer, loans):
+    with app.app_context():
+        own_id = User.query.filter_by(username='customer1').one().id
+    expected = sorted((loan[0] for loan in loans if loan[3] == own_id), reverse=True)
+    # Asking for another customer's loans still returns only their own
+    assert _walk(customer, f'customer_id={own_id + 1}') == expected
+
+
+def test_invalid_cursors_are_rejected(staff, loans):
+    cursor = staff.get('/api/loans?sort=amount&limit=5').get_json()['next_cursor']
+    assert staff.get(f'/api/loans?sort=-id&cursor={cursor}').status_code == 400
+    assert staff.get('/api/loans?cursor=not-a-cursor').status_code == 400
+    assert staff.get('/api/loans?sort=name').status_code == 400
+    assert staff.get('/api/loans?limit=0').status_code == 400
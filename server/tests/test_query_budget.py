@@ -0,0 +1,31 @@
+import logging
+
+from query_budget import query_budget
+
+
+def test_savings_balance_query_budget(app, customer):
+    app.extensions['identity_cache'].clear()
+    # Principal load + one projected balance query; then the balance alone
+    with query_budget(2):
+        assert customer.get('/api/savings').status_code == 200
+    with query_budget(1):
+        assert customer.get('/api/savings').status_code == 200
+
+
+def test_dashboard_query_budget(app, customer):
+    app.extensions['identity_cache'].clear()
+    app.extensions['dashboard_cache'].clear()
+    # Principal load + the single eager-loaded dashboard query; then the per-user cache
+    with query_budget(2):
+        assert customer.get('/api/dashboard').status_code == 200
+    with query_budget(0):
+        assert customer.get('/api/dashboard').status_code == 200
+
+
+def test_repeat_warnings_follow_debug_at_request_time(app, customer, caplog):
+    # app.run(debug=True) sets debug after create_app has run
+    app.debug = True
+    app.config['QUERY_REPEAT_THRESHOLD'] = 1
+    with caplog.at_level(logging.WARNING, logger=app.logger.name):
+        customer.get('/api/loans')
+    assert any('Possible N+1' in record.getMessage() for record in caplog.records)
@@ -0,0 +1,76 @@
+import pytest
+
+import seed
+from app import create_app
+from rate_limit import MemoryStore, SQLiteStore
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def store(request, tmp_path):
+    clock = Clock()
+    if request.param == 'memory':
+        store = MemoryStore(clock=clock)
+    else:
+        store = SQLiteStore(str(tmp_path / 'limits.db'), clock=clock)
+    return store, clock
+
+
+def test_bucket_locks_out_and_refills(store):
+    store, clock = store
+    assert [store.take('k', 3, 60) for _ in range(3)] == [None, None, None]
+    assert store.take('k', 3, 60) == 20  # one token refills every 20 s
+    clock.now += 20
+    assert store.take('k', 3, 60) is None
+    assert store.take('k', 3, 60) is not None
+    assert store.take('other', 3, 60) is None
+
+
+def test_refund_returns_a_token_but_never_overfills(store):
+    store, clock = store
+    store.take('k', 2, 60)
+    store.take('k', 2, 60)
+    store.take('k', 2, 60, cost=-1)
+    assert store.take('k', 2, 60) is None
+    assert store.take('k', 2, 60) is not None
+
+    for _ in range(5):
+        store.take('full', 2, 60, cost=-1)
+    assert [store.take('full', 2, 60) is None for _ in range(3)] == [True, True, False]
+
+
+@pytest.fixture
+def limited_app(config):
+    app = create_app({**config, 'RATE_LIMIT_ENABLED': True, 'RATE_LIMITS': {'login_account': (3, 300)}})
+    seed.seed_data(app)
+    return app
+
+
+def _login(client, password, email='customer1@example.com'):
+    return client.post('/api/login', json={'email': email, 'password': password})
+
+
+def test_failed_logins_lock_the_account(limited_app):
+    client = limited_app.test_client()
+    assert [_login(client, 'wrong').status_code for _ in range(3)] == [401, 401, 401]
+    response = _login(client, 'customer1234')
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) > 0
+    # Other accounts from the same address are unaffected
+    assert _login(client, 'customer1234', 'customer2@example.com').status_code == 200
+    # The bucket key ignores case and surrounding spaces
+    assert _login(client, 'customer1234', ' Customer1@Example.com').status_code == 429
+
+
+def test_successful_logins_do_not_spend_the_account_bucket(limited_app):
+    client = limited_app.test_client()
+    assert all(_login(client, 'customer1234').status_code == 200 for _ in range(6))
+    assert [_login(client, 'wrong').status_code for _ in range(3)] == [401, 401, 401]
+    assert _login(client, 'wrong').status_code == 429
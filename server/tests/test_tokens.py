@@ -0,0 +1,101 @@
+import pytest
+
+from identity import Principal
+from tokens import TokenService, InvalidToken
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def service():
+    service = TokenService(access_ttl=60, refresh_ttl=600, clock=Clock())
+    service._key = b'k' * 32
+    return service
+
+
+def _token_login(app, email='customer1@example.com', password='customer1234'):
+    response = app.test_client().post('/api/login', json={'email': email, 'password': password, 'auth': 'token'})
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def _get(app, path, tokens):
+    return app.test_client().get(path, headers={'Authorization': f'Bearer {tokens["access_token"]}'})
+
+
+def _refresh(app, tokens):
+    return app.test_client().post('/api/token/refresh', json={'refresh_token': tokens['refresh_token']})
+
+
+def test_tokens_expire_and_keep_their_type(service):
+    tokens = service.issue(Principal(7, 'someone', 'customer', 7, 3))
+    claims = service.decode(tokens['access_token'], 'access')
+    assert (claims['sub'], claims['cid'], claims['sa']) == (7, 7, 3)
+
+    with pytest.raises(InvalidToken, match='Wrong token type'):
+        service.decode(tokens['refresh_token'], 'access')
+    payload = tokens['access_token'].split('.')[0]
+    with pytest.raises(InvalidToken, match='Bad signature'):
+        service.decode(f'{payload}.{tokens["refresh_token"].split(".")[1]}', 'access')
+
+    service.clock.now += 60
+    with pytest.raises(InvalidToken, match='Token expired'):
+        service.decode(tokens['access_token'], 'access')
+    assert service.decode(tokens['refresh_token'], 'refresh')['sub'] == 7
+
+
+def test_refresh_rotates_the_refresh_token(app):
+    tokens = _token_login(app)
+    assert _get(app, '/api/savings', tokens).status_code == 200
+
+    response = _refresh(app, tokens)
+    assert response.status_code == 200
+    rotated = response.get_json()
+    assert rotated['refresh_token'] != tokens['refresh_token']
+    assert _get(app, '/api/savings', rotated).status_code == 200
+
+    # Each refresh token works once
+    replay = _refresh(app, tokens)
+    assert (replay.status_code, replay.get_json()['error']) == (401, 'Token revoked')
+    assert _refresh(app, rotated).status_code == 200
+
+
+def test_logout_revokes_the_access_and_refresh_token(app):
+    tokens = _token_login(app)
+    other = _token_login(app)
+
+    response = app.test_client().get('/api/logout', headers={'Authorization': f'Bearer {tokens["access_token"]}'})
+    assert response.status_code == 200
+
+    assert _get(app, '/api/savings', tokens).status_code == 401
+    assert _refresh(app, tokens).status_code == 401
+    # Other sessions of the same user are untouched
+    assert _get(app, '/api/savings', other).status_code == 200
+    assert _refresh(app, other).status_code == 200
+
+
+def test_role_change_revokes_every_token_of_the_user(app, admin):
+    tokens = _token_login(app, 'staff@example.com', 'staff1234')
+    # Customer search is disabled in tests, so an authorized staff request gets 404
+    assert _get(app, '/api/staff/customers/search?q=cus', tokens).status_code == 404
+
+    staff_id = app.extensions['auth_tokens'].decode(tokens['access_token'], 'access')['sub']
+    assert admin.put(f'/api/user/{staff_id}', json={'role': 'customer'}).status_code == 200
+
+    assert _get(app, '/api/staff/customers/search?q=cus', tokens).status_code == 401
+    assert _refresh(app, tokens).status_code == 401
+
+
+def test_refresh_rejects_garbage_and_access_tokens(app):
+    tokens = _token_login(app)
+    client = app.test_client()
+    assert client.post('/api/token/refresh', json={'refresh_token': 'not.a-token'}).status_code == 401
+    assert client.post('/api/token/refresh', json={}).status_code == 401
+    response = client.post('/api/token/refresh', json={'refresh_token': tokens['access_token']})
+    assert (response.status_code, response.get_json()['error']) == (401, 'Wrong token type')
@@ -0,0 +1,75 @@
+import time
+
+import pytest
+
+import seed
+from app import create_app
+from models import db, User, Customer, SavingsAccount, PortfolioSummary
+from conftest import login
+
+
+@pytest.fixture
+def search_app(config):
+    app = create_app({**config, 'CUSTOMER_SEARCH_ENABLED': True})
+    seed.seed_data(app)
+    return app
+
+
+def _search(client, query):
+    # The index builds in the background after the first request
+    deadline = time.monotonic() + 10
+    while True:
+        response = client.get(f'/api/staff/customers/search?q={query}')
+        if response.status_code != 503 or time.monotonic() > deadline:
+            return response
+        time.sleep(0.05)
+
+
+def _accounts(app):
+    with app.app_context():
+        return PortfolioSummary.query.filter_by(metric='deposits', bucket='total').one().count
+
+
+def test_deleting_a_customer_clears_caches_and_search(search_app):
+    app = search_app
+    client = app.test_client()
+    response = client.post('/api/register', json={
+        'username': 'dora', 'email': 'dora@example.com', 'password': 'dora12345', 'role': 'customer',
+    })
+    assert response.status_code == 201
+    dora = login(app, 'dora@example.com', 'dora12345')
+    assert dora.get('/api/savings').status_code == 200
+    with app.app_context():
+        user_id = User.query.filter_by(username='dora').one().id
+    assert app.extensions['identity_cache'].get(user_id) is not None
+
+    staff, admin = login(app, 'staff@example.com', 'staff1234'), login(app, 'admin@example.com', 'admin1234')
+    assert [row['id'] for row in _search(staff, 'dora').get_json()['results']] == [user_id]
+    accounts = _accounts(app)
+
+    assert admin.delete(f'/api/user/{user_id}').status_code == 200
+
+    assert app.extensions['identity_cache'].get(user_id) is None
+    assert dora.get('/api/savings').status_code == 401
+    assert _search(staff, 'dora').get_json()['results'] == []
+    assert _accounts(app) == accounts - 1
+    with app.app_context():
+        assert db.session.get(User, user_id) is None
+        assert db.session.get(Customer, user_id) is None
+        assert SavingsAccount.query.filter_by(customer_id=user_id).count() == 0
+
+
+def test_deleting_staff_removes_the_profile(app, admin):
+    with app.app_context():
+        user_id = User.query.filter_by(username='staffuser').one().id
+    assert admin.delete(f'/api/user/{user_id}').status_code == 200
+    with app.app_context():
+        assert db.session.get(User, user_id) is None
+
+
+def test_customers_with_loans_are_not_deleted(app, admin):
+    with app.app_context():
+        user_id = User.query.filter_by(username='customer1').one().id
+    assert admin.delete(f'/api/user/{user_id}').status_code == 409
+    with app.app_context():
+        assert db.session.get(User, user_id) is not None
@@ -0,0 +1,142 @@
+import base64
+import hashlib
+import hmac
+import json
+import os
+import threading
+import time
+
+from flask import current_app
+from werkzeug.local import LocalProxy
+
+from identity import Principal
+
+
+class InvalidToken(Exception):
+    pass
+
+
+def _b64encode(raw):
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode('ascii')
+
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+class TokenDenylist:
+    # Revoked token ids (as 64-bit ints) until their own expiry, plus a
+    # per-user cut-off that kills every token issued before it. Expired
+    # entries are purged as new ones arrive, so the size tracks only
+    # tokens that could still be presented.
+    def __init__(self, clock=time.time, purge_interval=60):
+        self.clock = clock
+        self.purge_interval = purge_interval
+        self._lock = threading.Lock()
+        self._tokens = {}  # jti -> exp
+        self._users = {}   # user id -> (revoked_at, forget_after)
+        self._next_purge = 0
+
+    def revoke(self, jti, exp):
+        with self._lock:
+            self._tokens[int(jti, 16)] = exp
+            self._purge()
+
+    def revoke_user(self, user_id, ttl):
+        now = self.clock()
+        with self._lock:
+            self._users[user_id] = (now, now + ttl)
+            self._purge()
+
+    def is_revoked(self, claims):
+        if int(claims['jti'], 16) in self._tokens:
+            return True
+        cutoff = self._users.get(claims['sub'])
+        return cutoff is not None and claims['iat'] <= cutoff[0]
+
+    def _purge(self):
+        now = self.clock()
+        if now < self._next_purge:
+            return
+        self._next_purge = now + self.purge_interval
+        self._tokens = {jti: exp for jti, exp in self._tokens.items() if exp > now}
+        self._users = {user_id: cutoff for user_id, cutoff in self._users.items() if cutoff[1] > now}
+
+    def __len__(self):
+        return len(self._tokens) + len(self._users)
+
+
+class TokenService:
+    # Compact HMAC-SHA256 signed tokens: base64(json claims).base64(mac).
+    # Access tokens carry everything the auth decorators and handlers need
+    # (see Principal), so authorizing a request never touches the database.
+    def __init__(self, access_ttl=900, refresh_ttl=14 * 24 * 3600, clock=time.time):
+        self.access_ttl = access_ttl
+        self.refresh_ttl = refresh_ttl
+        self.clock = clock
+        self.enabled = True
+        self.denylist = TokenDenylist(clock)
+        self._key = None
+
+    def init_app(self, app):
+        self.enabled = app.config.get('AUTH_TOKENS_ENABLED', self.enabled)
+        self.access_ttl = app.config.get('AUTH_ACCESS_TOKEN_TTL', self.access_ttl)
+        self.refresh_ttl = app.config.get('AUTH_REFRESH_TOKEN_TTL', self.refresh_ttl)
+        # Derived key, so a token can never double as a session cookie signature
+        self._key = hmac.new(app.config['SECRET_KEY'].encode(), b'malibora.tokens', hashlib.sha256).digest()
+
+    def _sign(self, claims):
+        payload = _b64encode(json.dumps(claims, separators=(',', ':')).encode())
+        mac = hmac.new(self._key, payload.encode('ascii'), hashlib.sha256).digest()
+        return f'{payload}.{_b64encode(mac)}'
+
+    def issue(self, principal):
+        now = round(self.clock(), 3)
+        refresh = {'typ': 'refresh', 'sub': principal.id, 'jti': os.urandom(8).hex(),
+                   'iat': now, 'exp': int(now + self.refresh_ttl)}
+        access = {'typ': 'access', 'sub': principal.id, 'role': principal.role,
+                  'cid': principal.customer_id, 'sa': principal.savings_account_id,
+                  'jti': os.urandom(8).hex(), 'rid': refresh['jti'], 'iat': now, 'exp': int(now + self.access_ttl)}
+        return {
+            'access_token': self._sign(access),
+            'refresh_token': self._sign(refresh),
+            'token_type': 'Bearer',
+            'expires_in': self.access_ttl,
+        }
+
+    def decode(self, token, typ):
+        try:
+            payload, mac = token.split('.')
+            expected = hmac.new(self._key, payload.encode('ascii'), hashlib.sha256).digest()
+            if not hmac.compare_digest(expected, _b64decode(mac)):
+                raise InvalidToken('Bad signature')
+            claims = json.loads(_b64decode(payload))
+        except (ValueError, UnicodeError) as exc:
+            raise InvalidToken('Malformed token') from exc
+        if claims.get('typ') != typ:
+            raise InvalidToken('Wrong token type')
+        if claims['exp'] <= self.clock():
+            raise InvalidToken('Token expired')
+        if self.denylist.is_revoked(claims):
+            raise InvalidToken('Token revoked')
+        return claims
+
+    def principal(self, claims):
+        return Principal(claims['sub'], None, claims['role'], claims['cid'], claims['sa'])
+
+    def revoke(self, claims):
+        # Revoking an access token also retires the refresh token issued with it
+        self.denylist.revoke(claims['jti'], claims['exp'])
+        if 'rid' in claims:
+            self.denylist.revoke(claims['rid'], int(claims['iat'] + self.refresh_ttl))
+
+    def revoke_user(self, user_id):
+        self.denylist.revoke_user(user_id, self.refresh_ttl)
+
+
+def init_app(app):
+    app.extensions['auth_tokens'] = instance = TokenService()
+    instance.init_app(app)
+
+
+auth_tokens = LocalProxy(lambda: current_app.extensions['auth_tokens'])